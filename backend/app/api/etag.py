@@ -0,0 +1,66 @@
+"""Strong ETags for conditional GET requests."""
+
+import hashlib
+import uuid
+from typing import FrozenSet, Iterable, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+# Clients must revalidate every time, but may reuse the body on 304.
+CACHE_CONTROL = "no-cache"
+
+
+def representation(
+    fields: Optional[FrozenSet[str]],
+    include: FrozenSet[str],
+    default_include: FrozenSet[str],
+) -> str:
+    """Variant tag of a sparse representation ("" for the route's default one).
+
+    Each `fields`/`include` combination gets its own ETag.
+    """
+    if fields is None and include == default_include:
+        return ""
+    selected = "*" if fields is None else ",".join(sorted(fields))
+    return f";{selected};{','.join(sorted(include))}"
+
+
+def entity_etag(kind: str, entity_id: uuid.UUID, version: int, variant: str = "") -> str:
+    if variant:
+        variant = "-" + hashlib.sha1(variant.encode()).hexdigest()[:12]
+    return f'"{kind}-{entity_id}-{version}{variant}"'
+
+
+def page_etag(
+    kind: str,
+    rows: Iterable[Tuple[uuid.UUID, int]],
+    has_more: bool,
+    variant: str = "",
+) -> str:
+    """ETag of a page from its (id, version) pairs and whether a next page exists."""
+    digest = hashlib.sha1(f"{kind}{variant}|{int(has_more)}".encode())
+    for entity_id, version in rows:
+        digest.update(f"|{entity_id}:{version}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def set_etag(response: Response, etag: Optional[str]) -> None:
+    if etag is not None:
+        response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
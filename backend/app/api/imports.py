@@ -0,0 +1,59 @@
+"""Streaming parsers for bulk import request bodies."""
+
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Tuple
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a UTF-8 byte stream into lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def parse_user_csv(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[str, str]]:
+    """Yield (email, name) pairs from CSV with an `email[,name]` header row."""
+    columns = None
+    async for line in lines:
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if columns is None:
+            columns = [c.strip().lower() for c in values]
+            if "email" not in columns:
+                raise ValueError("CSV header must contain an 'email' column")
+            continue
+        record = dict(zip(columns, values))
+        yield record.get("email", "").strip(), (record.get("name") or "").strip()
+
+
+async def parse_user_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[str, str]]:
+    """Yield (email, name) pairs from NDJSON objects."""
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_no}: invalid JSON ({e.msg})")
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {line_no}: expected a JSON object")
+        yield str(record.get("email") or "").strip(), str(record.get("name") or "").strip()
+
+
+USER_IMPORT_PARSERS = {
+    "text/csv": parse_user_csv,
+    "application/x-ndjson": parse_user_ndjson,
+    "application/jsonl": parse_user_ndjson,
+}
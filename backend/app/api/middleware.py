@@ -0,0 +1,74 @@
+"""ASGI middleware for the marketplace API."""
+
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.infrastructure.metrics import record_request, start_request
+from app.infrastructure.unit_of_work import CONSISTENCY_TOKEN_HEADER
+
+
+class ConsistencyTokenMiddleware:
+    """Return the post-commit consistency token of write requests as a header.
+
+    The token is set by the unit of work after the route has produced its
+    response, so it cannot be attached through FastAPI's `Response`
+    parameter and is added here when the response starts instead.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_token(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                token = scope.get("state", {}).get("consistency_token")
+                if token:
+                    MutableHeaders(scope=message).append(CONSISTENCY_TOKEN_HEADER, token)
+            await send(message)
+
+        await self.app(scope, receive, send_with_token)
+
+
+class MetricsMiddleware:
+    """Record latency and database usage of each request by route template.
+
+    The route is known only after routing, so it is read from the scope
+    once the app has handled the request. Unmatched paths share one label
+    to keep the number of series bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_request()
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            record_request(
+                scope["method"],
+                getattr(route, "path", "<unmatched>"),
+                status_code,
+                time.perf_counter() - started,
+                stats,
+            )
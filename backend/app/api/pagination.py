@@ -0,0 +1,30 @@
+"""Opaque cursors for keyset pagination."""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from app.domain.queries import PageKey
+
+
+def encode_cursor(key: Optional[PageKey]) -> Optional[str]:
+    """Encode a (created_at, id) page key as an opaque URL-safe string."""
+    if key is None:
+        return None
+    created_at, row_id = key
+    raw = json.dumps([created_at.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[PageKey]:
+    """Decode a cursor from `encode_cursor`; raises ValueError if malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -1,15 +1,34 @@
 """API routes for the marketplace."""
 
+import csv
+import io
 import uuid
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from app.infrastructure.db import get_db
-from app.infrastructure.repositories import UserRepository, OrderRepository
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, FrozenSet, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+
+from app.infrastructure.cache import cache_stats
+from app.infrastructure.unit_of_work import (
+    UnitOfWork,
+    get_uow,
+    get_read_uow,
+    streaming_read_uow,
+)
 from app.application.user_service import UserService
 from app.application.order_service import OrderService
+from app.domain.order import OrderStatus
+from app.domain.user import ImportStatus
+from app.domain.queries import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    ORDER_INCLUDES,
+    OrderFilter,
+    PageKey,
+)
 from app.domain.exceptions import (
     DomainException,
     InvalidEmailError,
@@ -18,35 +37,118 @@ from app.domain.exceptions import (
     OrderNotFoundError,
     OrderAlreadyPaidError,
     OrderCancelledError,
+    OrderCompletedError,
+    OrderVersionConflictError,
+    InvalidStatusTransitionError,
     InvalidQuantityError,
     InvalidPriceError,
 )
 
 from .schemas import (
+    CacheStatsResponse,
     CreateUser,
     UserResponse,
     CreateOrder,
     AddOrderItem,
+    AddOrderItems,
+    BulkStatusChange,
+    BulkStatusReport,
+    StatusTransitionResponse,
     OrderResponse,
     OrderDetailResponse,
     OrderItemResponse,
     OrderStatusChangeResponse,
+    UserPage,
+    UserImportReport,
+    UserImportRowResponse,
+    OrderPage,
+)
+from .pagination import encode_cursor, decode_cursor
+from .imports import USER_IMPORT_PARSERS, iter_lines
+from .etag import entity_etag, etag_matches, not_modified, page_etag, representation
+from .serialization import (
+    LIST_INCLUDES,
+    ORDER_FIELDS,
+    json_response,
+    order_detail_response,
+    order_item_response,
+    order_page,
+    order_response,
+    user_page,
+    user_response,
 )
 
 router = APIRouter()
 
 
-def get_user_service(db: AsyncSession = Depends(get_db)) -> UserService:
+def get_user_service(uow: UnitOfWork = Depends(get_uow)) -> UserService:
     """Dependency to get UserService."""
-    repo = UserRepository(db)
-    return UserService(repo)
+    return UserService(uow.users)
 
 
-def get_order_service(db: AsyncSession = Depends(get_db)) -> OrderService:
+def get_order_service(uow: UnitOfWork = Depends(get_uow)) -> OrderService:
     """Dependency to get OrderService."""
-    user_repo = UserRepository(db)
-    order_repo = OrderRepository(db)
-    return OrderService(order_repo, user_repo)
+    return OrderService(uow.orders, uow.users)
+
+
+def get_read_user_service(uow: UnitOfWork = Depends(get_read_uow)) -> UserService:
+    """Dependency to get UserService for read-only routes."""
+    return UserService(uow.users)
+
+
+def get_read_order_service(uow: UnitOfWork = Depends(get_read_uow)) -> OrderService:
+    """Dependency to get OrderService for read-only routes."""
+    return OrderService(uow.orders, uow.users)
+
+
+def get_order_filter(
+    user_id: uuid.UUID = None,
+    order_status: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    min_total: Optional[Decimal] = None,
+    max_total: Optional[Decimal] = None,
+) -> OrderFilter:
+    """Dependency to build an OrderFilter from query parameters."""
+    return OrderFilter(
+        user_id=user_id,
+        status=order_status,
+        created_from=created_from,
+        created_to=created_to,
+        min_total=min_total,
+        max_total=max_total,
+    )
+
+
+def get_page_key(cursor: Optional[str] = None) -> Optional[PageKey]:
+    """Dependency to decode the `cursor` query parameter."""
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _name_set(param: str, value: Optional[str], allowed: FrozenSet[str]) -> Optional[FrozenSet[str]]:
+    if value is None:
+        return None
+    names = frozenset(name.strip() for name in value.split(",") if name.strip())
+    unknown = names - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {param}: {', '.join(sorted(unknown))}",
+        )
+    return names
+
+
+def get_order_fields(fields: Optional[str] = None) -> Optional[FrozenSet[str]]:
+    """Dependency to parse `fields=id,status,...` (all fields when absent)."""
+    return _name_set("fields", fields, ORDER_FIELDS)
+
+
+def get_order_include(include: Optional[str] = None) -> Optional[FrozenSet[str]]:
+    """Dependency to parse `include=items,history` (route default when absent)."""
+    return _name_set("include", include, ORDER_INCLUDES)
 
 
 # User endpoints
@@ -67,34 +169,79 @@ async def create_user(data: CreateUser, service: UserService = Depends(get_user_
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
-@router.get("/users", response_model=List[UserResponse])
-async def list_users(service: UserService = Depends(get_user_service)):
-    """List all users."""
-    users = await service.list_users()
-    return [
-        UserResponse(
-            id=u.id,
-            email=u.email,
-            name=u.name,
-            created_at=u.created_at,
+@router.post("/users/import", response_model=UserImportReport)
+async def import_users(request: Request, service: UserService = Depends(get_user_service)):
+    """Bulk-register users from a streamed CSV or NDJSON body.
+
+    Existing emails are reported as duplicates instead of failing the import.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    parser = USER_IMPORT_PARSERS.get(content_type)
+    if parser is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Expected one of: {', '.join(USER_IMPORT_PARSERS)}",
         )
-        for u in users
-    ]
+    try:
+        rows = await service.import_users(parser(iter_lines(request.stream())))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    counts = {s: 0 for s in ImportStatus}
+    for r in rows:
+        counts[r.status] += 1
+    return UserImportReport(
+        inserted=counts[ImportStatus.INSERTED],
+        duplicates=counts[ImportStatus.DUPLICATE],
+        invalid=counts[ImportStatus.INVALID],
+        rows=[
+            UserImportRowResponse(
+                row=r.row,
+                email=r.email,
+                status=r.status.value,
+                id=r.user_id,
+                error=r.error,
+            )
+            for r in rows
+        ],
+    )
+
+
+@router.get("/users", response_model=UserPage)
+async def list_users(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[PageKey] = Depends(get_page_key),
+    service: UserService = Depends(get_read_user_service),
+):
+    """List users page by page, ordered by creation time."""
+    if request.headers.get("if-none-match"):
+        rows = await service.list_user_versions(limit, after)
+        etag = page_etag("users", rows[:limit], len(rows) > limit)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    page = await service.list_users(limit, after)
+    return json_response(
+        user_page(page.items, encode_cursor(page.next_key)),
+        page_etag("users", [(u.id, u.version) for u in page.items], page.next_key is not None),
+    )
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-async def get_user(user_id: uuid.UUID, service: UserService = Depends(get_user_service)):
+async def get_user(
+    user_id: uuid.UUID,
+    request: Request,
+    service: UserService = Depends(get_read_user_service),
+):
     """Get user by ID."""
+    if request.headers.get("if-none-match"):
+        version = await service.get_version(user_id)
+        if version is not None and etag_matches(request, etag := entity_etag("user", user_id, version)):
+            return not_modified(etag)
     try:
         user = await service.get_by_id(user_id)
-        return UserResponse(
-            id=user.id,
-            email=user.email,
-            name=user.name,
-            created_at=user.created_at,
-        )
     except UserNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return json_response(user_response(user), entity_etag("user", user.id, user.version))
 
 
 # Order endpoints
@@ -103,29 +250,89 @@ async def create_order(data: CreateOrder, service: OrderService = Depends(get_or
     """Create a new order."""
     try:
         order = await service.create_order(data.user_id)
-        return _order_to_response(order)
+        return order_response(order)
     except UserNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
-@router.get("/orders", response_model=List[OrderResponse])
+@router.get("/orders", response_model=OrderPage)
 async def list_orders(
-    user_id: uuid.UUID = None,
-    service: OrderService = Depends(get_order_service),
+    request: Request,
+    order_filter: OrderFilter = Depends(get_order_filter),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[PageKey] = Depends(get_page_key),
+    fields: Optional[FrozenSet[str]] = Depends(get_order_fields),
+    include: Optional[FrozenSet[str]] = Depends(get_order_include),
+    service: OrderService = Depends(get_read_order_service),
 ):
-    """List orders, optionally filtered by user."""
-    orders = await service.list_orders(user_id)
-    return [_order_to_response(o) for o in orders]
+    """List orders page by page, optionally filtered.
+
+    Items are included unless `include` says otherwise; history only on request.
+    """
+    include = LIST_INCLUDES if include is None else include
+    variant = representation(fields, include, LIST_INCLUDES)
+    if request.headers.get("if-none-match"):
+        rows = await service.list_order_versions(order_filter, limit, after)
+        etag = page_etag("orders", rows[:limit], len(rows) > limit, variant)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    try:
+        page = await service.list_orders(order_filter, limit, after, include)
+    except UserNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return json_response(
+        order_page(page.items, encode_cursor(page.next_key), fields, include),
+        page_etag(
+            "orders",
+            [(o.id, o.version) for o in page.items],
+            page.next_key is not None,
+            variant,
+        ),
+    )
+
+
+@router.get("/orders/export")
+async def export_orders(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    order_filter: OrderFilter = Depends(get_order_filter),
+):
+    """Stream all matching orders as NDJSON (with items) or CSV."""
+    if export_format == "csv":
+        return StreamingResponse(
+            _export_chunks(order_filter, _orders_to_csv_lines, header=_CSV_HEADER),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="orders.csv"'},
+        )
+    return StreamingResponse(
+        _export_chunks(order_filter, _orders_to_ndjson_lines),
+        media_type="application/x-ndjson",
+    )
 
 
 @router.get("/orders/{order_id}", response_model=OrderDetailResponse)
-async def get_order(order_id: uuid.UUID, service: OrderService = Depends(get_order_service)):
-    """Get order by ID with full details."""
+async def get_order(
+    order_id: uuid.UUID,
+    request: Request,
+    fields: Optional[FrozenSet[str]] = Depends(get_order_fields),
+    include: Optional[FrozenSet[str]] = Depends(get_order_include),
+    service: OrderService = Depends(get_read_order_service),
+):
+    """Get order by ID, with items and history unless `include` narrows it."""
+    include = ORDER_INCLUDES if include is None else include
+    variant = representation(fields, include, ORDER_INCLUDES)
+    if request.headers.get("if-none-match"):
+        version = await service.get_order_version(order_id)
+        etag = None if version is None else entity_etag("order", order_id, version, variant)
+        if etag is not None and etag_matches(request, etag):
+            return not_modified(etag)
     try:
-        order = await service.get_order(order_id)
-        return _order_to_detail_response(order)
+        order = await service.get_order(order_id, include)
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return json_response(
+        order_detail_response(order, fields, include),
+        entity_etag("order", order.id, order.version, variant),
+    )
 
 
 @router.post("/orders/{order_id}/items", response_model=OrderItemResponse, status_code=status.HTTP_201_CREATED)
@@ -142,27 +349,79 @@ async def add_order_item(
             data.price,
             data.quantity,
         )
-        return OrderItemResponse(
-            id=item.id,
-            product_name=item.product_name,
-            price=item.price,
-            quantity=item.quantity,
-            subtotal=item.subtotal,
+        return order_item_response(item)
+    except OrderNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except OrderVersionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except (OrderCancelledError, OrderCompletedError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except (InvalidQuantityError, InvalidPriceError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post(
+    "/orders/{order_id}/items/batch",
+    response_model=List[OrderItemResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+async def add_order_items(
+    order_id: uuid.UUID,
+    data: AddOrderItems,
+    service: OrderService = Depends(get_order_service),
+):
+    """Add several items to an order at once."""
+    try:
+        items = await service.add_items(
+            order_id,
+            [(i.product_name, i.price, i.quantity) for i in data.items],
         )
+        return [order_item_response(item) for item in items]
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
-    except OrderCancelledError as e:
+    except OrderVersionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except (OrderCancelledError, OrderCompletedError) as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except (InvalidQuantityError, InvalidPriceError) as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post("/orders/transitions", response_model=BulkStatusReport)
+async def transition_orders(data: BulkStatusChange, service: OrderService = Depends(get_order_service)):
+    """Move many orders to a status at once.
+
+    Orders whose current status does not allow the transition are reported
+    with the reason instead of failing the request. A filter moves at most
+    MAX_TRANSITION_BATCH orders; repeat the request until `moved` is 0.
+    """
+    order_filter = OrderFilter(**data.filter.model_dump()) if data.filter is not None else None
+    try:
+        results = await service.transition_orders(data.status, data.order_ids, order_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    moved = sum(1 for r in results if r.moved)
+    return BulkStatusReport(
+        moved=moved,
+        failed=len(results) - moved,
+        results=[
+            StatusTransitionResponse(
+                id=r.order_id,
+                status=r.status.value if r.status is not None else None,
+                moved=r.moved,
+                error=r.error,
+            )
+            for r in results
+        ],
+    )
+
+
 @router.post("/orders/{order_id}/pay", response_model=OrderResponse)
 async def pay_order(order_id: uuid.UUID, service: OrderService = Depends(get_order_service)):
     """Pay for an order."""
     try:
         order = await service.pay_order(order_id)
-        return _order_to_response(order)
+        return order_response(order)
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except OrderAlreadyPaidError as e:
@@ -176,11 +435,15 @@ async def cancel_order(order_id: uuid.UUID, service: OrderService = Depends(get_
     """Cancel an order."""
     try:
         order = await service.cancel_order(order_id)
-        return _order_to_response(order)
+        return order_response(order)
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except OrderVersionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except OrderAlreadyPaidError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except OrderCancelledError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.post("/orders/{order_id}/ship", response_model=OrderResponse)
@@ -188,10 +451,14 @@ async def ship_order(order_id: uuid.UUID, service: OrderService = Depends(get_or
     """Ship an order."""
     try:
         order = await service.ship_order(order_id)
-        return _order_to_response(order)
+        return order_response(order)
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
-    except ValueError as e:
+    except OrderVersionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except InvalidStatusTransitionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except OrderCancelledError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
@@ -200,15 +467,19 @@ async def complete_order(order_id: uuid.UUID, service: OrderService = Depends(ge
     """Complete an order."""
     try:
         order = await service.complete_order(order_id)
-        return _order_to_response(order)
+        return order_response(order)
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
-    except ValueError as e:
+    except OrderVersionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except InvalidStatusTransitionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except OrderCancelledError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.get("/orders/{order_id}/history", response_model=List[OrderStatusChangeResponse])
-async def get_order_history(order_id: uuid.UUID, service: OrderService = Depends(get_order_service)):
+async def get_order_history(order_id: uuid.UUID, service: OrderService = Depends(get_read_order_service)):
     """Get order status history."""
     try:
         history = await service.get_order_history(order_id)
@@ -224,52 +495,64 @@ async def get_order_history(order_id: uuid.UUID, service: OrderService = Depends
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
-# Helper functions
-def _order_to_response(order) -> OrderResponse:
-    """Convert Order domain object to response."""
-    return OrderResponse(
-        id=order.id,
-        user_id=order.user_id,
-        status=order.status.value,
-        total_amount=order.total_amount,
-        created_at=order.created_at,
-        items=[
-            OrderItemResponse(
-                id=item.id,
-                product_name=item.product_name,
-                price=item.price,
-                quantity=item.quantity,
-                subtotal=item.subtotal,
-            )
-            for item in order.items
-        ],
-    )
+# Cache endpoints
+@router.get("/cache/stats", response_model=Dict[str, CacheStatsResponse])
+async def get_cache_stats():
+    """Hit/miss counters and sizes of the in-process caches.
 
+    With READ_DATABASE_URL set the caches are off and the counters stay at zero.
+    """
+    return {
+        name: CacheStatsResponse(
+            hits=stats.hits,
+            misses=stats.misses,
+            size=stats.size,
+            max_entries=stats.max_entries,
+        )
+        for name, stats in cache_stats().items()
+    }
 
-def _order_to_detail_response(order) -> OrderDetailResponse:
-    """Convert Order domain object to detailed response."""
-    return OrderDetailResponse(
-        id=order.id,
-        user_id=order.user_id,
-        status=order.status.value,
-        total_amount=order.total_amount,
-        created_at=order.created_at,
-        items=[
-            OrderItemResponse(
-                id=item.id,
-                product_name=item.product_name,
-                price=item.price,
-                quantity=item.quantity,
-                subtotal=item.subtotal,
-            )
-            for item in order.items
-        ],
-        status_history=[
-            OrderStatusChangeResponse(
-                id=h.id,
-                status=h.status.value,
-                changed_at=h.changed_at,
-            )
-            for h in order.status_history
-        ],
-    )
+
+# Helper functions
+_EXPORT_CHUNK_SIZE = 500
+
+_CSV_HEADER = "id,user_id,status,total_amount,created_at,items_count\r\n"
+
+
+async def _export_chunks(order_filter: OrderFilter, to_lines, header: str = ""):
+    """Read orders through a server-side cursor and yield text in chunks.
+
+    The session is opened here rather than through a dependency because the
+    body is streamed after the route (and its dependencies) has returned.
+    """
+    if header:
+        yield header
+    async with streaming_read_uow() as uow:
+        service = OrderService(uow.orders, uow.users)
+        batch = []
+        async for order in service.export_orders(order_filter):
+            batch.append(order)
+            if len(batch) >= _EXPORT_CHUNK_SIZE:
+                yield to_lines(batch)
+                batch = []
+        if batch:
+            yield to_lines(batch)
+
+
+def _orders_to_ndjson_lines(orders) -> bytes:
+    return b"".join(to_json(order_response(o)) + b"\n" for o in orders)
+
+
+def _orders_to_csv_lines(orders) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for o in orders:
+        writer.writerow([
+            o.id,
+            o.user_id,
+            o.status.value,
+            o.total_amount,
+            o.created_at.isoformat(),
+            len(o.items),
+        ])
+    return buffer.getvalue()
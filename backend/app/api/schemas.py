@@ -5,7 +5,10 @@ from datetime import datetime
 from decimal import Decimal
 from typing import List, Optional
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
+
+from app.domain.order import OrderStatus
+from app.domain.queries import MAX_TRANSITION_BATCH
 
 
 # User schemas
@@ -24,6 +27,21 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class UserImportRowResponse(BaseModel):
+    row: int
+    email: str
+    status: str
+    id: Optional[uuid.UUID] = None
+    error: Optional[str] = None
+
+
+class UserImportReport(BaseModel):
+    inserted: int
+    duplicates: int
+    invalid: int
+    rows: List[UserImportRowResponse]
+
+
 # Order schemas
 class CreateOrder(BaseModel):
     user_id: uuid.UUID
@@ -35,6 +53,10 @@ class AddOrderItem(BaseModel):
     quantity: int = Field(..., gt=0)
 
 
+class AddOrderItems(BaseModel):
+    items: List[AddOrderItem] = Field(..., min_length=1)
+
+
 class OrderItemResponse(BaseModel):
     id: uuid.UUID
     product_name: str
@@ -68,6 +90,66 @@ class OrderDetailResponse(OrderResponse):
     status_history: List[OrderStatusChangeResponse] = []
 
 
+# Pagination schemas
+class UserPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+
+
+class OrderPage(BaseModel):
+    items: List[OrderResponse]
+    next_cursor: Optional[str] = None
+
+
+class OrderFilterParams(BaseModel):
+    user_id: Optional[uuid.UUID] = None
+    status: Optional[OrderStatus] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    min_total: Optional[Decimal] = None
+    max_total: Optional[Decimal] = None
+
+
+class BulkStatusChange(BaseModel):
+    """Target status for the orders in `order_ids` or matching `filter`.
+
+    A filter needs at least one criterion and moves at most
+    MAX_TRANSITION_BATCH eligible orders per request, oldest first.
+    """
+    status: OrderStatus
+    order_ids: Optional[List[uuid.UUID]] = Field(None, min_length=1, max_length=MAX_TRANSITION_BATCH)
+    filter: Optional[OrderFilterParams] = None
+
+    @model_validator(mode="after")
+    def check_selection(self) -> "BulkStatusChange":
+        if (self.order_ids is None) == (self.filter is None):
+            raise ValueError("Specify either order_ids or filter")
+        if self.filter is not None and not self.filter.model_dump(exclude_none=True):
+            raise ValueError("filter must set at least one criterion")
+        return self
+
+
+class StatusTransitionResponse(BaseModel):
+    id: uuid.UUID
+    status: Optional[str] = None
+    moved: bool
+    error: Optional[str] = None
+
+
+class BulkStatusReport(BaseModel):
+    moved: int
+    failed: int
+    results: List[StatusTransitionResponse]
+
+
 # Error response
 class ErrorResponse(BaseModel):
     detail: str
+
+
+# Cache schemas
+class CacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    size: int
+    max_entries: int
@@ -0,0 +1,114 @@
+"""Fast path from domain objects to JSON response bytes.
+
+Domain objects are already valid, so instead of building response models
+(and having FastAPI validate them again against `response_model`) the hot
+read routes turn them into plain dicts shaped like the schemas in
+`schemas.py` and encode them with pydantic-core's `to_json`. UUIDs and
+datetimes come out exactly as the response models would render them;
+Money amounts are written as the same decimal strings the models emit
+for Decimal fields. For such routes the decorator's `response_model` only
+documents the schema.
+"""
+
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+from fastapi import Response
+from pydantic_core import to_json
+
+from app.domain.queries import ORDER_INCLUDES
+
+from .etag import set_etag
+
+
+def json_response(data: Any, etag: Optional[str] = None) -> Response:
+    response = Response(content=to_json(data), media_type="application/json")
+    set_etag(response, etag)
+    return response
+
+
+def user_response(user) -> Dict[str, Any]:
+    """UserResponse."""
+    return {
+        "id": user.id,
+        "email": user.email,
+        "name": user.name,
+        "created_at": user.created_at,
+    }
+
+
+def user_page(users: Iterable, next_cursor: Optional[str]) -> Dict[str, Any]:
+    """UserPage."""
+    return {"items": [user_response(u) for u in users], "next_cursor": next_cursor}
+
+
+# Scalar fields of OrderResponse that `fields=` can select.
+ORDER_FIELDS = frozenset({"id", "user_id", "status", "total_amount", "created_at"})
+
+LIST_INCLUDES = frozenset({"items"})
+
+
+def order_item_response(item) -> Dict[str, Any]:
+    """OrderItemResponse."""
+    return {
+        "id": item.id,
+        "product_name": item.product_name,
+        "price": str(item.price),
+        "quantity": item.quantity,
+        "subtotal": str(item.subtotal),
+    }
+
+
+def order_items(order) -> List[Dict[str, Any]]:
+    """List[OrderItemResponse]."""
+    return [order_item_response(item) for item in order.items]
+
+
+def order_response(
+    order,
+    fields: Optional[FrozenSet[str]] = None,
+    include: FrozenSet[str] = LIST_INCLUDES,
+) -> Dict[str, Any]:
+    """OrderResponse, or OrderDetailResponse when history is included.
+
+    `fields` limits the scalar fields (all by default); collections are
+    rendered only when named in `include`.
+    """
+    data = {
+        "id": order.id,
+        "user_id": order.user_id,
+        "status": order.status.value,
+        "total_amount": str(order.total_amount),
+        "created_at": order.created_at,
+    }
+    if fields is not None:
+        data = {name: value for name, value in data.items() if name in fields}
+    if "items" in include:
+        data["items"] = order_items(order)
+    if "history" in include:
+        data["status_history"] = [
+            {"id": h.id, "status": h.status.value, "changed_at": h.changed_at}
+            for h in order.status_history
+        ]
+    return data
+
+
+def order_detail_response(
+    order,
+    fields: Optional[FrozenSet[str]] = None,
+    include: FrozenSet[str] = ORDER_INCLUDES,
+) -> Dict[str, Any]:
+    """OrderDetailResponse."""
+    return order_response(order, fields, include)
+
+
+def order_page(
+    orders: Iterable,
+    next_cursor: Optional[str],
+    fields: Optional[FrozenSet[str]] = None,
+    include: FrozenSet[str] = LIST_INCLUDES,
+) -> Dict[str, Any]:
+    """OrderPage."""
+    return {
+        "items": [order_response(o, fields, include) for o in orders],
+        "next_cursor": next_cursor,
+    }
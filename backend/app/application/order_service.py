@@ -2,10 +2,31 @@
 
 import uuid
 from decimal import Decimal
-from typing import List, Optional
+from typing import AsyncIterator, FrozenSet, List, Optional, Tuple
 
-from app.domain.order import Order, OrderItem, OrderStatus
-from app.domain.exceptions import OrderNotFoundError, UserNotFoundError
+from app.domain.order import (
+    Order,
+    OrderItem,
+    OrderStatus,
+    StatusTransitionResult,
+    allowed_from,
+    transition_error,
+)
+from app.domain.queries import (
+    DEFAULT_PAGE_SIZE,
+    MAX_TRANSITION_BATCH,
+    ORDER_INCLUDES,
+    OrderFilter,
+    Page,
+    PageKey,
+)
+from app.domain.exceptions import (
+    OrderAlreadyPaidError,
+    OrderCancelledError,
+    OrderNotFoundError,
+    OrderVersionConflictError,
+    UserNotFoundError,
+)
 
 
 class OrderService:
@@ -25,8 +46,12 @@ class OrderService:
         return order
 
     # TODO: Реализовать get_order(order_id) -> Order
-    async def get_order(self, order_id: uuid.UUID) -> Order:
-        order = await self.order_repo.find_by_id(order_id)
+    async def get_order(
+        self,
+        order_id: uuid.UUID,
+        include: FrozenSet[str] = ORDER_INCLUDES,
+    ) -> Order:
+        order = await self.order_repo.find_by_id(order_id, include)
         if order is None:
             raise OrderNotFoundError(order_id)
         return order
@@ -45,18 +70,34 @@ class OrderService:
         await self.order_repo.save(order)
         return order_item
 
+    async def add_items(
+        self,
+        order_id: uuid.UUID,
+        items: List[Tuple[str, Decimal, int]],
+    ) -> List[OrderItem]:
+        """Добавить пачку товаров: одна загрузка заказа и одна запись."""
+        order = await self.order_repo.find_by_id(order_id)
+        if order is None:
+            raise OrderNotFoundError(order_id)
+        new_items = order.add_items(items)
+        await self.order_repo.save(order)
+        return new_items
 
     # TODO: Реализовать pay_order(order_id) -> Order
     # КРИТИЧНО: гарантировать что нельзя оплатить дважды!
     async def pay_order(self, order_id: uuid.UUID) -> Order:
-        order = await self.order_repo.find_by_id(order_id)
-        if order is None:
+        # Оплата одним условным UPDATE ... WHERE status = 'created': две
+        # параллельные оплаты не могут обе пройти, агрегат не загружается.
+        order = await self.order_repo.pay(order_id)
+        if order is not None:
+            return order
+
+        status = await self.order_repo.get_status(order_id)
+        if status is None:
             raise OrderNotFoundError(order_id)
-        # проверка есть но пусть еще одна будет
-        if order.status == OrderStatus.CREATED:
-            order.pay()
-        await self.order_repo.save(order)
-        return order
+        if status == OrderStatus.CANCELLED:
+            raise OrderCancelledError(order_id)
+        raise OrderAlreadyPaidError(order_id)
 
     # TODO: Реализовать cancel_order(order_id) -> Order
     async def cancel_order(self, order_id: uuid.UUID) -> Order:
@@ -85,15 +126,74 @@ class OrderService:
         await self.order_repo.save(order)
         return order
 
+    async def transition_orders(
+        self,
+        target: OrderStatus,
+        order_ids: Optional[List[uuid.UUID]] = None,
+        filter: Optional[OrderFilter] = None,
+    ) -> List[StatusTransitionResult]:
+        """Перевести в `target` заказы из списка или под фильтром.
+
+        Разрешённые переходы выполняются одним UPDATE, для остальных
+        заказов в результате указана причина отказа. По фильтру за вызов
+        переводится не больше MAX_TRANSITION_BATCH заказов.
+        """
+        allowed = allowed_from(target)
+        if not allowed:
+            raise ValueError(f"No order can be moved to {target.value}")
+        if order_ids is not None:
+            order_ids = list(dict.fromkeys(order_ids))
+
+        rows = await self.order_repo.transition_many(
+            target, allowed, order_ids, filter, limit=MAX_TRANSITION_BATCH
+        )
+        results = []
+        for order_id, current, moved in rows:
+            if moved:
+                results.append(StatusTransitionResult(order_id, target, True))
+                continue
+            if current is None:
+                error = OrderNotFoundError(order_id)
+            elif current in allowed:
+                # Статус изменился между выборкой и UPDATE.
+                error = OrderVersionConflictError(order_id)
+            else:
+                error = transition_error(order_id, current, target)
+            results.append(StatusTransitionResult(order_id, current, False, str(error)))
+        return results
+
     # TODO: Реализовать list_orders(user_id: Optional) -> List[Order]
-    async def list_orders(self, user_id: Optional[uuid.UUID] = None) -> List[Order]:
-        if user_id:
-            user = await self.user_repo.find_by_id(user_id)
+    async def list_orders(
+        self,
+        filter: Optional[OrderFilter] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[PageKey] = None,
+        include: FrozenSet[str] = ORDER_INCLUDES,
+    ) -> Page[Order]:
+        filter = filter or OrderFilter()
+        if filter.user_id:
+            user = await self.user_repo.find_by_id(filter.user_id)
             if not user:
-                raise UserNotFoundError(user_id)
-            return await self.order_repo.find_by_user(user_id)
-        
-        return await self.order_repo.find_all()
+                raise UserNotFoundError(filter.user_id)
+
+        return await self.order_repo.find_page(filter, limit, after, include)
+
+    async def get_order_version(self, order_id: uuid.UUID) -> Optional[int]:
+        return await self.order_repo.get_version(order_id)
+
+    async def list_order_versions(
+        self,
+        filter: Optional[OrderFilter] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[PageKey] = None,
+    ) -> List[Tuple[uuid.UUID, int]]:
+        """Версии заказов страницы, без загрузки самих заказов."""
+        return await self.order_repo.find_page_versions(filter or OrderFilter(), limit, after)
+
+    async def export_orders(self, filter: Optional[OrderFilter] = None) -> AsyncIterator[Order]:
+        """Потоково выдать заказы фильтра вместе с товарами."""
+        async for order in self.order_repo.stream(filter or OrderFilter()):
+            yield order
 
     # TODO: Реализовать get_order_history(order_id) -> List[OrderStatusChange]
     async def get_order_history(self, order_id: uuid.UUID) -> List:
@@ -1,10 +1,22 @@
 """Сервис для работы с пользователями."""
 
 import uuid
-from typing import Optional, List
+from typing import AsyncIterable, List, Optional, Tuple
 
-from app.domain.user import User
-from app.domain.exceptions import EmailAlreadyExistsError, UserNotFoundError
+from app.domain.user import ImportStatus, User, UserImportRow
+from app.domain.queries import DEFAULT_PAGE_SIZE, Page, PageKey
+from app.domain.exceptions import (
+    EmailAlreadyExistsError,
+    InvalidEmailError,
+    UserNotFoundError,
+)
+
+
+IMPORT_BATCH_SIZE = 10_000
+
+# Совпадает с VARCHAR(50) у users.email и users.name: длинная строка
+# иначе оборвала бы весь импорт ошибкой базы.
+_MAX_FIELD_LENGTH = 50
 
 
 class UserService:
@@ -42,6 +54,62 @@ class UserService:
             raise UserNotFoundError(email)
 
     # TODO: Реализовать list_users() -> List[User]
-    async def list_users(self) -> List[User]:
-        all_users = await self.repo.find_all()
-        return all_users
+    async def list_users(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[PageKey] = None,
+    ) -> Page[User]:
+        return await self.repo.find_page(limit, after)
+
+    async def get_version(self, user_id: uuid.UUID) -> Optional[int]:
+        return await self.repo.get_version(user_id)
+
+    async def list_user_versions(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[PageKey] = None,
+    ) -> List[Tuple[uuid.UUID, int]]:
+        return await self.repo.find_page_versions(limit, after)
+
+    async def import_users(
+        self,
+        records: AsyncIterable[Tuple[str, str]],
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ) -> List[UserImportRow]:
+        """Массовый импорт пар (email, name).
+
+        Невалидные строки отсеиваются доменной проверкой, остальные пачками
+        уходят в repo.insert_many; занятые email помечаются как дубликаты.
+        """
+        report: List[UserImportRow] = []
+        batch: List[Tuple[int, User]] = []
+        row = 0
+        async for email, name in records:
+            row += 1
+            if len(email) > _MAX_FIELD_LENGTH or len(name) > _MAX_FIELD_LENGTH:
+                report.append(UserImportRow(
+                    row, email, ImportStatus.INVALID,
+                    error=f"Email and name must be at most {_MAX_FIELD_LENGTH} characters",
+                ))
+                continue
+            try:
+                batch.append((row, User(email=email, name=name)))
+            except InvalidEmailError as e:
+                report.append(UserImportRow(row, email, ImportStatus.INVALID, error=str(e)))
+                continue
+            if len(batch) >= batch_size:
+                report.extend(await self._insert_batch(batch))
+                batch = []
+        if batch:
+            report.extend(await self._insert_batch(batch))
+        report.sort(key=lambda r: r.row)
+        return report
+
+    async def _insert_batch(self, batch: List[Tuple[int, User]]) -> List[UserImportRow]:
+        inserted = await self.repo.insert_many([user for _, user in batch])
+        return [
+            UserImportRow(row, user.email, ImportStatus.INSERTED, user_id=user.id)
+            if user.id in inserted
+            else UserImportRow(row, user.email, ImportStatus.DUPLICATE)
+            for row, user in batch
+        ]
@@ -1,13 +1,27 @@
 # Domain layer exports
 # Students must implement these classes
 
-from .user import User
-from .order import Order, OrderItem, OrderStatus, OrderStatusChange
+from .user import ImportStatus, User, UserImportRow
+from .money import Money
+from .order import (
+    Order,
+    OrderItem,
+    OrderStatus,
+    OrderStatusChange,
+    StatusTransitionResult,
+    TERMINAL_STATUSES,
+    TRANSITIONS,
+    allowed_from,
+)
+from .queries import ORDER_INCLUDES, OrderFilter, Page, PageKey
 from .exceptions import (
     DomainException,
     InvalidEmailError,
+    InvalidStatusTransitionError,
     OrderAlreadyPaidError,
     OrderCancelledError,
+    OrderCompletedError,
+    OrderVersionConflictError,
     InvalidQuantityError,
     InvalidPriceError,
     InvalidAmountError,
@@ -18,14 +32,28 @@ from .exceptions import (
 
 __all__ = [
     "User",
+    "UserImportRow",
+    "ImportStatus",
     "Order",
     "OrderItem",
     "OrderStatus",
     "OrderStatusChange",
+    "StatusTransitionResult",
+    "TERMINAL_STATUSES",
+    "TRANSITIONS",
+    "allowed_from",
+    "Money",
+    "OrderFilter",
+    "ORDER_INCLUDES",
+    "Page",
+    "PageKey",
     "DomainException",
     "InvalidEmailError",
+    "InvalidStatusTransitionError",
     "OrderAlreadyPaidError",
     "OrderCancelledError",
+    "OrderCompletedError",
+    "OrderVersionConflictError",
     "InvalidQuantityError",
     "InvalidPriceError",
     "InvalidAmountError",
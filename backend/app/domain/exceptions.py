@@ -23,6 +23,27 @@ class OrderAlreadyPaidError(DomainException):
         super().__init__(f"Order {order_id} is already paid")
 
 
+class OrderVersionConflictError(DomainException):
+    """Raised when an order was modified concurrently since it was loaded."""
+
+    def __init__(self, order_id):
+        self.order_id = order_id
+        super().__init__(f"Order {order_id} was modified concurrently")
+
+
+class InvalidStatusTransitionError(DomainException):
+    """Raised when the transition table does not allow a status change."""
+
+    def __init__(self, order_id, current, target):
+        self.order_id = order_id
+        self.current = current
+        self.target = target
+        super().__init__(
+            f"Order {order_id} cannot move from {getattr(current, 'value', current)} "
+            f"to {getattr(target, 'value', target)}"
+        )
+
+
 class OrderCancelledError(DomainException):
     """Raised when attempting to modify a cancelled order."""
 
@@ -31,6 +52,14 @@ class OrderCancelledError(DomainException):
         super().__init__(f"Order {order_id} is cancelled")
 
 
+class OrderCompletedError(DomainException):
+    """Raised when attempting to modify a completed order."""
+
+    def __init__(self, order_id):
+        self.order_id = order_id
+        super().__init__(f"Order {order_id} is completed")
+
+
 class InvalidQuantityError(DomainException):
     """Raised when quantity is not positive."""
 
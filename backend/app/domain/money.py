@@ -0,0 +1,111 @@
+"""Денежная сумма в минимальных единицах (копейках)."""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+
+class Money:
+    """Сумма как целое число копеек; соответствует столбцам DECIMAL(10,2).
+
+    Арифметика идёт на int, Decimal нужен только на границах (ввод API,
+    параметры SQL). Сравнивается и с Decimal/int, поэтому
+    `total_amount == Decimal("19.99")` работает как раньше.
+
+    Значение неизменяемо: все операции возвращают новый Money. Это не
+    frozen-dataclass, потому что его __init__ заметно медленнее, а Money
+    создаётся для каждого товара при загрузке заказов.
+    """
+
+    __slots__ = ("cents",)
+
+    def __init__(self, cents: int = 0):
+        self.cents = cents
+
+    @classmethod
+    def of(cls, value) -> "Money":
+        """Money из Decimal, строки, целого числа единиц или float из JSON."""
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, Decimal):
+            return cls.from_decimal(value)
+        if isinstance(value, int):
+            return cls(value * 100)
+        if isinstance(value, float):
+            return cls(round(value * 100))
+        return cls.from_decimal(Decimal(value))
+
+    @classmethod
+    def from_decimal(cls, value: Decimal) -> "Money":
+        """Округляет до копеек так же, как NUMERIC(10,2) в PostgreSQL."""
+        scaled = value.scaleb(2)
+        cents = int(scaled)
+        if scaled != cents:
+            cents = int(scaled.to_integral_value(ROUND_HALF_UP))
+        return cls(cents)
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.cents).scaleb(-2)
+
+    def __repr__(self) -> str:
+        return f"Money({self.cents})"
+
+    def __copy__(self) -> "Money":
+        return self
+
+    def __deepcopy__(self, memo) -> "Money":
+        return self
+
+    def __str__(self) -> str:
+        units, cents = divmod(abs(self.cents), 100)
+        sign = "-" if self.cents < 0 else ""
+        return f"{sign}{units}.{cents:02d}"
+
+    def __add__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.cents + other.cents)
+
+    def __sub__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.cents - other.cents)
+
+    def __mul__(self, quantity: int) -> "Money":
+        if not isinstance(quantity, int):
+            return NotImplemented
+        return Money(self.cents * quantity)
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> "Money":
+        return Money(-self.cents)
+
+    def _cents_of(self, other):
+        if isinstance(other, Money):
+            return other.cents
+        if isinstance(other, (int, Decimal)):
+            return other * 100
+        return NotImplemented
+
+    def __eq__(self, other) -> bool:
+        cents = self._cents_of(other)
+        return cents if cents is NotImplemented else self.cents == cents
+
+    def __hash__(self) -> int:
+        # Совпадает с hash() равного Decimal/int.
+        return hash(self.to_decimal())
+
+    def __lt__(self, other) -> bool:
+        cents = self._cents_of(other)
+        return cents if cents is NotImplemented else self.cents < cents
+
+    def __le__(self, other) -> bool:
+        cents = self._cents_of(other)
+        return cents if cents is NotImplemented else self.cents <= cents
+
+    def __gt__(self, other) -> bool:
+        cents = self._cents_of(other)
+        return cents if cents is NotImplemented else self.cents > cents
+
+    def __ge__(self, other) -> bool:
+        cents = self._cents_of(other)
+        return cents if cents is NotImplemented else self.cents >= cents
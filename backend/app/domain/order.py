@@ -5,11 +5,14 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from decimal import Decimal
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
 
+from .money import Money
 from .exceptions import (
+    InvalidStatusTransitionError,
     OrderAlreadyPaidError,
     OrderCancelledError,
+    OrderCompletedError,
     InvalidQuantityError,
     InvalidPriceError,
     InvalidAmountError,
@@ -26,23 +29,82 @@ class OrderStatus(str, Enum):
     COMPLETED = "completed"
 
 
+# Таблица переходов: целевой статус -> статусы, из которых в него можно
+# перейти. По ней проверяются и переходы одного заказа, и массовые
+# (UPDATE ... WHERE status = ANY(allowed_from(target))).
+TRANSITIONS: Dict[OrderStatus, FrozenSet[OrderStatus]] = {
+    OrderStatus.PAID: frozenset({OrderStatus.CREATED}),
+    OrderStatus.CANCELLED: frozenset({OrderStatus.CREATED}),
+    OrderStatus.SHIPPED: frozenset({OrderStatus.PAID}),
+    OrderStatus.COMPLETED: frozenset({OrderStatus.SHIPPED}),
+}
+
+
+# Из этих статусов переходов нет, и товары в таких заказах не меняются.
+TERMINAL_STATUSES: FrozenSet[OrderStatus] = frozenset({
+    OrderStatus.COMPLETED,
+    OrderStatus.CANCELLED,
+})
+
+
+def allowed_from(target: OrderStatus) -> FrozenSet[OrderStatus]:
+    """Статусы, из которых разрешён переход в `target`."""
+    return TRANSITIONS.get(target, frozenset())
+
+
+def transition_error(
+    order_id: uuid.UUID,
+    current: OrderStatus,
+    target: OrderStatus,
+) -> Exception:
+    """Исключение для запрещённого перехода current -> target.
+
+    Отменённый заказ менять нельзя; оплатить или отменить можно только
+    новый заказ, остальные к этому моменту уже оплачены.
+    """
+    if current == OrderStatus.CANCELLED:
+        return OrderCancelledError(order_id)
+    if target in (OrderStatus.PAID, OrderStatus.CANCELLED) and current != OrderStatus.CREATED:
+        return OrderAlreadyPaidError(order_id)
+    return InvalidStatusTransitionError(order_id, current, target)
+
+
 # TODO: Реализовать OrderItem (dataclass)
 # Поля: product_name, price, quantity, id, order_id
 # Свойство: subtotal (price * quantity)
 # Валидация: quantity > 0, price >= 0
-@dataclass
+@dataclass(slots=True)
 class OrderItem:
     product_name: str
     order_id: Optional[uuid.UUID] = None
-    price: Decimal = Decimal()
+    price: Money = Money()
     quantity: int = 0
     id: uuid.UUID = field(default_factory=uuid.uuid4)
 
+    @classmethod
+    def restore(
+        cls,
+        id: uuid.UUID,
+        order_id: uuid.UUID,
+        product_name: str,
+        price: Money,
+        quantity: int,
+    ) -> "OrderItem":
+        """Восстановить сохранённый товар без повторной валидации."""
+        item = object.__new__(cls)
+        item.id = id
+        item.order_id = order_id
+        item.product_name = product_name
+        item.price = price
+        item.quantity = quantity
+        return item
+
     @property
-    def subtotal(self) -> Decimal:
+    def subtotal(self) -> Money:
         return self.price * self.quantity
 
     def __post_init__(self):
+        self.price = Money.of(self.price)
         if self.quantity <= 0:
             raise InvalidQuantityError(self.quantity)
         if self.price < 0:
@@ -51,13 +113,29 @@ class OrderItem:
 
 # TODO: Реализовать OrderStatusChange (dataclass)
 # Поля: order_id, status, changed_at, id
-@dataclass
+@dataclass(slots=True)
 class OrderStatusChange:
     order_id: uuid.UUID
     status: OrderStatus
     changed_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     id: uuid.UUID = field(default_factory=uuid.uuid4)
 
+    @classmethod
+    def restore(
+        cls,
+        id: uuid.UUID,
+        order_id: uuid.UUID,
+        status: OrderStatus,
+        changed_at: datetime,
+    ) -> "OrderStatusChange":
+        """Восстановить сохранённую запись истории (без default_factory)."""
+        change = object.__new__(cls)
+        change.id = id
+        change.order_id = order_id
+        change.status = status
+        change.changed_at = changed_at
+        return change
+
 
 
 # TODO: Реализовать Order (dataclass)
@@ -68,60 +146,109 @@ class OrderStatusChange:
 #   - cancel() -> None
 #   - ship() -> None
 #   - complete() -> None
-@dataclass
+@dataclass(slots=True)
 class Order:
     user_id: uuid.UUID
     id: uuid.UUID = field(default_factory=uuid.uuid4)
     status: OrderStatus = OrderStatus.CREATED
-    total_amount: Decimal = Decimal()
+    total_amount: Money = Money()
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     items: List[OrderItem] = field(default_factory=list)
     status_history: List[OrderStatusChange] = field(default_factory=list)
+    version: int = 1
 
     def __post_init__(self):
+        self.total_amount = Money.of(self.total_amount)
         if self.total_amount < 0:
             raise InvalidAmountError(self.total_amount)
 
-    def add_item(self, product_name: str, price: Decimal, quantity: int) -> OrderItem:
-        if self.status == OrderStatus.CANCELLED:
-            raise OrderCancelledError(self.id)
+    @classmethod
+    def restore(
+        cls,
+        id: uuid.UUID,
+        user_id: uuid.UUID,
+        status: OrderStatus,
+        total_amount: Money,
+        created_at: datetime,
+        version: int,
+        items: List[OrderItem],
+        status_history: List[OrderStatusChange],
+    ) -> "Order":
+        """Восстановить сохранённый заказ без повторной валидации.
+
+        Данные уже проверены ограничениями БД, поэтому __post_init__ и
+        default_factory не вызываются.
+        """
+        order = object.__new__(cls)
+        order.id = id
+        order.user_id = user_id
+        order.status = status
+        order.total_amount = total_amount
+        order.created_at = created_at
+        order.version = version
+        order.items = items
+        order.status_history = status_history
+        return order
+
+    def add_item(self, product_name: str, price: Union[Money, Decimal], quantity: int) -> OrderItem:
+        self._check_items_editable()
         item = OrderItem(product_name=product_name, price=price, quantity=quantity, order_id=self.id)
         self.items.append(item)
         self.total_amount += item.subtotal
         return item
-    
-    def pay(self) -> None:
-        if self.status == OrderStatus.PAID:
-            raise OrderAlreadyPaidError(self.id)
+
+    def add_items(self, items: Iterable[Tuple[str, Union[Money, Decimal], int]]) -> List[OrderItem]:
+        """Добавить несколько товаров атомарно.
+
+        Все позиции проверяются до изменения заказа: если хотя бы одна
+        невалидна, заказ остаётся прежним.
+        """
+        self._check_items_editable()
+        new_items = [
+            OrderItem(product_name=product_name, price=price, quantity=quantity, order_id=self.id)
+            for product_name, price, quantity in items
+        ]
+        self.items.extend(new_items)
+        self.total_amount += sum((item.subtotal for item in new_items), Money())
+        return new_items
+
+    def _check_items_editable(self) -> None:
+        """Товары завершённого или отменённого заказа не меняются."""
         if self.status == OrderStatus.CANCELLED:
             raise OrderCancelledError(self.id)
-        self.status = OrderStatus.PAID
+        if self.status == OrderStatus.COMPLETED:
+            raise OrderCompletedError(self.id)
+
+    def transition_to(self, target: OrderStatus) -> None:
+        """Перейти в `target`, если это разрешено таблицей TRANSITIONS."""
+        if self.status not in allowed_from(target):
+            raise transition_error(self.id, self.status, target)
+        self.status = target
         self.status_history.append(
-            OrderStatusChange(order_id=self.id, status=self.status)
+            OrderStatusChange(order_id=self.id, status=target)
         )
 
+    def pay(self) -> None:
+        self.transition_to(OrderStatus.PAID)
+
     def cancel(self) -> None:
-        if self.status == OrderStatus.CANCELLED:
-            raise OrderCancelledError(self.id)
-        if self.status == OrderStatus.PAID:
-            raise OrderAlreadyPaidError(self.id)
-        self.status = OrderStatus.CANCELLED
-        self.status_history.append(
-            OrderStatusChange(order_id=self.id, status=self.status)
-        )
+        self.transition_to(OrderStatus.CANCELLED)
 
     def ship(self) -> None:
-        if self.status != OrderStatus.PAID:
-            raise ValueError('Order needs to be paid to be shipped.')
-        self.status = OrderStatus.SHIPPED
-        self.status_history.append(
-            OrderStatusChange(order_id=self.id, status=self.status)
-        )
+        self.transition_to(OrderStatus.SHIPPED)
 
     def complete(self) -> None:
-        if self.status != OrderStatus.SHIPPED:
-            raise ValueError('Order needs to be shipped to be completed.')
-        self.status = OrderStatus.COMPLETED
-        self.status_history.append(
-            OrderStatusChange(order_id=self.id, status=self.status)
-        )
\ No newline at end of file
+        self.transition_to(OrderStatus.COMPLETED)
+
+
+@dataclass
+class StatusTransitionResult:
+    """Итог массовой смены статуса для одного заказа.
+
+    `status` — новый статус, если заказ переведён, иначе текущий
+    (None, если заказ не найден).
+    """
+    order_id: uuid.UUID
+    status: Optional[OrderStatus]
+    moved: bool
+    error: Optional[str] = None
@@ -0,0 +1,43 @@
+"""Критерии выборки и постраничные результаты."""
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import FrozenSet, Generic, List, Optional, Tuple, TypeVar
+
+from .order import OrderStatus
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Заказов за один массовый переход статуса (списком или по фильтру).
+MAX_TRANSITION_BATCH = 10_000
+
+# Коллекции заказа, которые можно не загружать; по умолчанию загружаются все.
+ORDER_INCLUDES: FrozenSet[str] = frozenset({"items", "history"})
+
+# Ключ keyset-пагинации: (created_at, id) последней строки страницы.
+PageKey = Tuple[datetime, uuid.UUID]
+
+
+@dataclass
+class OrderFilter:
+    """Условия отбора заказов; пустые поля не ограничивают выборку."""
+
+    user_id: Optional[uuid.UUID] = None
+    status: Optional[OrderStatus] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    min_total: Optional[Decimal] = None
+    max_total: Optional[Decimal] = None
+
+
+@dataclass
+class Page(Generic[T]):
+    """Страница результатов и ключ для запроса следующей страницы."""
+
+    items: List[T]
+    next_key: Optional[PageKey] = None
@@ -4,6 +4,8 @@ import uuid
 import re
 from datetime import datetime, timezone
 from dataclasses import dataclass, field
+from enum import Enum
+from typing import Optional
 
 from .exceptions import InvalidEmailError
 
@@ -14,14 +16,49 @@ from .exceptions import InvalidEmailError
 # - Реализовать валидацию email в __post_init__
 # - Regex: r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
 
-@dataclass
+@dataclass(slots=True)
 class User:
     email: str
     name: str = ''
     id: uuid.UUID = field(default_factory=uuid.uuid4)
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 1
 
     def __post_init__(self):
         pattern = r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
         if not re.fullmatch(pattern, self.email):
             raise InvalidEmailError(self.email)
+
+    @classmethod
+    def restore(
+        cls,
+        id: uuid.UUID,
+        email: str,
+        name: str,
+        created_at: datetime,
+        version: int,
+    ) -> "User":
+        """Восстановить сохранённого пользователя без проверки email."""
+        user = object.__new__(cls)
+        user.id = id
+        user.email = email
+        user.name = name
+        user.created_at = created_at
+        user.version = version
+        return user
+
+
+class ImportStatus(str, Enum):
+    INSERTED = "inserted"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
+
+
+@dataclass
+class UserImportRow:
+    """Результат импорта одной строки файла (нумерация с 1)."""
+    row: int
+    email: str
+    status: ImportStatus
+    user_id: Optional[uuid.UUID] = None
+    error: Optional[str] = None
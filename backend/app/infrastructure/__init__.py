@@ -1,4 +1,36 @@
-from .db import engine, SessionLocal, get_db
+from .db import (
+    SessionLocal,
+    ReadSessionLocal,
+    init_engine,
+    get_engine,
+    get_read_engine,
+    warm_up_pool,
+    dispose_engine,
+    get_db,
+)
+from .settings import CacheSettings, DatabaseSettings
 from .repositories import UserRepository, OrderRepository
+from .cache import TTLCache, configure_caches, cache_stats
+from .unit_of_work import UnitOfWork, get_uow, get_read_uow, streaming_read_uow
 
-__all__ = ["engine", "SessionLocal", "get_db", "UserRepository", "OrderRepository"]
+__all__ = [
+    "SessionLocal",
+    "ReadSessionLocal",
+    "init_engine",
+    "get_engine",
+    "get_read_engine",
+    "warm_up_pool",
+    "dispose_engine",
+    "DatabaseSettings",
+    "CacheSettings",
+    "get_db",
+    "UserRepository",
+    "OrderRepository",
+    "TTLCache",
+    "configure_caches",
+    "cache_stats",
+    "UnitOfWork",
+    "get_uow",
+    "get_read_uow",
+    "streaming_read_uow",
+]
@@ -0,0 +1,243 @@
+"""In-process TTL/LRU caches in front of the user and order repositories."""
+
+import copy
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Optional, Set
+
+from app.domain.order import TERMINAL_STATUSES, Order
+from app.domain.queries import ORDER_INCLUDES
+from app.domain.user import User
+
+from .repositories import OrderRepository, UserRepository
+from .settings import CacheSettings
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+    max_entries: int
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries also expire after a TTL.
+
+    `generation` grows with every invalidation. A reader takes it before
+    loading from the database and passes it to `set()`, which then drops
+    the value if anything was invalidated meanwhile: the load may have
+    started before a write committed and hold the old row.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return default
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        if self.max_entries <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self.generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, len(self._entries), self.max_entries)
+
+
+class _CachedRepository:
+    """Delegates to the wrapped repository and tracks keys written in this unit of work.
+
+    Written keys are invalidated on save and again after commit or rollback,
+    and are never cached from this session: until commit it may hold data
+    other requests must not see.
+
+    `use_cache` lets reads of keys not written here be served from the
+    cache; `fill_cache` lets loaded values be stored in it and should only
+    be set for sessions reading the primary, since a lagging replica would
+    cache old rows.
+    """
+
+    def __init__(self, repo, cache: TTLCache, use_cache: bool = True, fill_cache: bool = True):
+        self._repo = repo
+        self.cache = cache
+        self.use_cache = use_cache
+        self.fill_cache = fill_cache
+        self._written: Set[Hashable] = set()
+
+    def __getattr__(self, name):
+        return getattr(self._repo, name)
+
+    def _can_read(self, key: Hashable) -> bool:
+        return self.use_cache and key not in self._written
+
+    def _can_fill(self, key: Hashable) -> bool:
+        return self.fill_cache and key not in self._written
+
+    def _mark_written(self, key: Hashable) -> None:
+        self._written.add(key)
+        self.cache.invalidate(key)
+
+    def end_transaction(self) -> None:
+        """Drop entries for keys written in the finished transaction."""
+        for key in self._written:
+            self.cache.invalidate(key)
+        self._written.clear()
+
+
+class CachedUserRepository(_CachedRepository):
+    """UserRepository with find_by_id served from the cache."""
+
+    async def find_by_id(self, user_id: uuid.UUID) -> Optional[User]:
+        if self._can_read(user_id):
+            user = self.cache.get(user_id, _MISSING)
+            if user is not _MISSING:
+                return copy.copy(user)
+        generation = self.cache.generation
+        user = await self._repo.find_by_id(user_id)
+        if user is not None and self._can_fill(user_id):
+            self.cache.set(user_id, copy.copy(user), generation=generation)
+        return user
+
+    async def save(self, user: User) -> None:
+        self._mark_written(user.id)
+        await self._repo.save(user)
+
+
+class CachedOrderRepository(_CachedRepository):
+    """OrderRepository with find_by_id served from the cache.
+
+    Callers get their own deep copy, registered with the wrapped repository
+    so that save() still writes only what changed.
+    """
+
+    def __init__(
+        self,
+        repo: OrderRepository,
+        cache: TTLCache,
+        terminal_ttl: Optional[float] = None,
+        use_cache: bool = True,
+        fill_cache: bool = True,
+    ):
+        super().__init__(repo, cache, use_cache, fill_cache)
+        self.terminal_ttl = terminal_ttl
+
+    async def find_by_id(
+        self,
+        order_id: uuid.UUID,
+        include: FrozenSet[str] = ORDER_INCLUDES,
+    ) -> Optional[Order]:
+        """Only complete orders are cached; a cached one also serves partial reads."""
+        if self._can_read(order_id):
+            order = self.cache.get(order_id, _MISSING)
+            if order is not _MISSING:
+                return self._repo._remember(copy.deepcopy(order))
+        generation = self.cache.generation
+        order = await self._repo.find_by_id(order_id, include)
+        if order is not None and self._can_fill(order_id) and include >= ORDER_INCLUDES:
+            ttl = self.terminal_ttl if order.status in TERMINAL_STATUSES else None
+            self.cache.set(order_id, copy.deepcopy(order), ttl, generation)
+        return order
+
+    async def save(self, order: Order) -> None:
+        self._mark_written(order.id)
+        await self._repo.save(order)
+
+    async def pay(self, order_id: uuid.UUID) -> Optional[Order]:
+        self._mark_written(order_id)
+        return await self._repo.pay(order_id)
+
+    async def transition_many(self, *args, **kwargs):
+        rows = await self._repo.transition_many(*args, **kwargs)
+        for order_id, _, moved in rows:
+            if moved:
+                self._mark_written(order_id)
+        return rows
+
+
+_caches: Dict[str, TTLCache] = {}
+_settings: Optional[CacheSettings] = None
+
+
+def configure_caches(settings: Optional[CacheSettings] = None) -> None:
+    """(Re)create the process-wide caches."""
+    global _settings
+    _settings = settings or CacheSettings.from_env()
+    _caches["users"] = TTLCache(_settings.max_entries, _settings.user_ttl)
+    _caches["orders"] = TTLCache(_settings.max_entries, _settings.order_ttl)
+
+
+def _get_caches() -> Dict[str, TTLCache]:
+    if not _caches:
+        configure_caches()
+    return _caches
+
+
+def cached_repositories(
+    users: UserRepository,
+    orders: OrderRepository,
+    use_cache: bool = False,
+    fill_cache: bool = False,
+    use_user_cache: Optional[bool] = None,
+):
+    """Wrap a session's repositories with the process-wide caches.
+
+    By default the cache is bypassed and only invalidated by writes.
+    `use_user_cache` overrides `use_cache` for the user repository.
+    """
+    caches = _get_caches()
+    if use_user_cache is None:
+        use_user_cache = use_cache
+    return (
+        CachedUserRepository(users, caches["users"], use_user_cache, fill_cache),
+        CachedOrderRepository(
+            orders, caches["orders"], _settings.terminal_order_ttl, use_cache, fill_cache
+        ),
+    )
+
+
+def cache_stats() -> Dict[str, CacheStats]:
+    return {name: cache.stats() for name, cache in _get_caches().items()}
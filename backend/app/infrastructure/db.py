@@ -1,19 +1,125 @@
 """Database connection and session management."""
 
-import os
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import asyncio
+from typing import Optional
 
-DATABASE_URL = os.getenv(
-    "DATABASE_URL",
-    "postgresql+asyncpg://postgres:postgres@db:5432/marketplace"
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
 )
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+from .metrics import instrument_engine
+from .settings import DatabaseSettings
+
+_settings: Optional[DatabaseSettings] = None
+_engine: Optional[AsyncEngine] = None
+_read_engine: Optional[AsyncEngine] = None
+
+# Session factories are bound to the engines in init_engine().
+SessionLocal = async_sessionmaker(expire_on_commit=False, class_=AsyncSession)
+
+# Read-only sessions run in autocommit mode, so no BEGIN/COMMIT is sent.
+ReadSessionLocal = async_sessionmaker(expire_on_commit=False, class_=AsyncSession)
+
+# Autocommit sessions on the read replica (or on the primary without one).
+ReplicaSessionLocal = async_sessionmaker(expire_on_commit=False, class_=AsyncSession)
+
+
+def init_engine(settings: Optional[DatabaseSettings] = None) -> AsyncEngine:
+    """Create the engines on first use and bind the session factories to them."""
+    global _settings, _engine, _read_engine
+    if _engine is None:
+        _settings = settings or DatabaseSettings.from_env()
+        _engine = create_async_engine(_settings.url, **_settings.engine_options())
+        instrument_engine(_engine)
+        if _settings.read_url:
+            _read_engine = create_async_engine(
+                _settings.read_url, **_settings.engine_options()
+            )
+            instrument_engine(_read_engine)
+        SessionLocal.configure(bind=_engine)
+        ReadSessionLocal.configure(
+            bind=_engine.execution_options(isolation_level="AUTOCOMMIT")
+        )
+        ReplicaSessionLocal.configure(
+            bind=(_read_engine or _engine).execution_options(isolation_level="AUTOCOMMIT")
+        )
+    return _engine
+
+
+def get_engine() -> AsyncEngine:
+    """Return the engine, creating it from the environment if needed."""
+    return init_engine()
+
+
+def get_read_engine() -> AsyncEngine:
+    """Return the read replica engine, or the primary without a replica."""
+    init_engine()
+    return _read_engine or _engine
+
+
+def get_settings() -> DatabaseSettings:
+    """Return the settings the engines were created with."""
+    init_engine()
+    return _settings
+
+
+def has_read_replica() -> bool:
+    init_engine()
+    return _read_engine is not None
+
+
+async def current_wal_lsn(session: AsyncSession) -> str:
+    """Primary WAL position, used as a read-your-writes consistency token."""
+    return await session.scalar(text("SELECT pg_current_wal_lsn()::text"))
+
+
+async def replica_has_replayed(session: AsyncSession, lsn: str) -> bool:
+    """Whether the replica behind `session` has replayed WAL up to `lsn`."""
+    return bool(await session.scalar(
+        text("""
+            SELECT COALESCE(pg_last_wal_replay_lsn(), pg_current_wal_lsn())
+                >= CAST(:lsn AS pg_lsn)
+        """),
+        {"lsn": lsn},
+    ))
+
+
+async def warm_up_pool(connections: int) -> None:
+    """Open `connections` pooled connections so first requests skip the handshake."""
+    if connections <= 0:
+        return
+    engines = [get_engine()]
+    if _read_engine is not None:
+        engines.append(_read_engine)
+
+    async def _touch(engine: AsyncEngine) -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(
+        *(_touch(engine) for engine in engines for _ in range(connections))
+    )
+
+
+async def dispose_engine() -> None:
+    """Close all pooled connections and forget the engines."""
+    global _settings, _engine, _read_engine
+    if _read_engine is not None:
+        await _read_engine.dispose()
+        _read_engine = None
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+    _settings = None
 
 
 async def get_db() -> AsyncSession:
     """Dependency for getting database session."""
+    init_engine()
     async with SessionLocal() as session:
         try:
             yield session
@@ -0,0 +1,204 @@
+"""In-process request metrics rendered in the Prometheus text format.
+
+The metrics middleware opens a `RequestStats` for every HTTP request and
+stores it in a context variable. SQLAlchemy cursor events on the engines
+add each statement's duration and result row count to the current
+request's stats. When the request finishes, the middleware records the stats in
+histograms labelled by method and route template. Statements run outside
+a request (startup, CLI tools) are not counted.
+
+Metrics are kept per process: with several workers, each one exposes its
+own numbers.
+
+Result rows are rows sent by the database, not domain objects: order
+queries aggregate items and history with json_agg, so an order with all
+its items and history is one result row.
+"""
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000)
+
+Labels = Tuple[str, ...]
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    result_rows: int = 0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def start_request() -> RequestStats:
+    """Start collecting database stats for the current request."""
+    stats = RequestStats()
+    _current.set(stats)
+    return stats
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label_names: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str],
+        buckets: Sequence[float],
+    ):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts, sum, count); counts are not cumulative.
+        self._series: Dict[Labels, Tuple[List[int], float, int]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        counts, total, count = self._series.get(labels) or ([0] * len(self.buckets), 0.0, 0)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        self._series[labels] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = _format_labels(self.label_names, labels, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {count}")
+            plain = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{plain} {total:g}")
+            lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+_ROUTE_LABELS = ("method", "route")
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code.",
+    ("method", "route", "status"),
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    _ROUTE_LABELS,
+    LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database statements executed per HTTP request.",
+    _ROUTE_LABELS,
+    QUERY_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in database statements per HTTP request.",
+    _ROUTE_LABELS,
+    LATENCY_BUCKETS,
+)
+REQUEST_RESULT_ROWS = Histogram(
+    "http_request_db_result_rows",
+    "Result rows returned by database statements per HTTP request "
+    "(a JSON-aggregated collection is one row with its parent).",
+    _ROUTE_LABELS,
+    ROW_BUCKETS,
+)
+
+_METRICS = (REQUESTS, REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_DB_SECONDS, REQUEST_RESULT_ROWS)
+
+
+def record_request(method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+    labels = (method, route)
+    REQUESTS.inc((method, route, str(status)))
+    REQUEST_SECONDS.observe(labels, seconds)
+    REQUEST_QUERIES.observe(labels, stats.queries)
+    REQUEST_DB_SECONDS.observe(labels, stats.db_seconds)
+    REQUEST_RESULT_ROWS.observe(labels, stats.result_rows)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("metrics_query_start")
+    if started:
+        stats.db_seconds += time.perf_counter() - started.pop()
+    stats.queries += 1
+    # For asyncpg the rowcount of a SELECT is the number of fetched rows;
+    # server-side cursors (streamed exports) report -1 and are not counted.
+    if cursor.description is not None and cursor.rowcount > 0:
+        stats.result_rows += cursor.rowcount
+
+
+def _handle_error(context) -> None:
+    # A failed statement never reaches after_cursor_execute.
+    started = context.connection.info.get("metrics_query_start") if context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Count statements, their time and result rows for the current request."""
+    target = engine.sync_engine
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_error)
@@ -0,0 +1,166 @@
+"""Versioned SQL migration runner.
+
+Applies ``migrations/NNN_name.sql`` files in order and records each applied
+version in the ``schema_migrations`` table.
+
+A file is run as one script inside a transaction together with its version
+row, unless its first line is ``-- migrate: no-transaction``. Such files
+(needed for ``CREATE INDEX CONCURRENTLY``) are split on ``;`` and run
+statement by statement in autocommit mode, so they must not contain
+function bodies. Their statements should be idempotent (``IF NOT EXISTS``)
+because a failure leaves the earlier statements applied.
+
+Usage::
+
+    python -m app.infrastructure.migrations             # apply pending
+    python -m app.infrastructure.migrations --baseline 1  # mark 001 applied
+"""
+
+import argparse
+import asyncio
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .db import dispose_engine, get_engine
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+# Serializes runners started at the same time (e.g. several app replicas).
+_ADVISORY_LOCK_ID = 0x6D696772
+
+_FILE_RE = re.compile(r"^(\d+)_[\w-]+\.sql$")
+
+# Databases created by docker-entrypoint-initdb.d before the runner existed
+# have only 001 applied and no schema_migrations rows.
+PRE_LEDGER_BASELINE = 1
+
+_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+    def statements(self) -> List[str]:
+        lines = [
+            line for line in self.sql.splitlines()
+            if not line.strip().startswith("--")
+        ]
+        return [s.strip() for s in "\n".join(lines).split(";") if s.strip()]
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Migration files in `directory`, ordered by version."""
+    migrations = []
+    for path in directory.iterdir():
+        match = _FILE_RE.match(path.name)
+        if match:
+            migrations.append(Migration(int(match.group(1)), path.name, path.read_text()))
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+async def migrate(
+    engine: AsyncEngine,
+    directory: Path = MIGRATIONS_DIR,
+    baseline: Optional[int] = None,
+) -> List[Migration]:
+    """Apply pending migrations and return the ones that were applied.
+
+    With `baseline`, versions up to it are recorded as applied without being
+    run. Without it, a database that already has the schema but an empty
+    ledger (created by ``docker-entrypoint-initdb.d``) is baselined at
+    `PRE_LEDGER_BASELINE`.
+    """
+    migrations = discover(directory)
+    applied: List[Migration] = []
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        raw = await connection.get_raw_connection()
+        conn = raw.driver_connection
+
+        await conn.execute("SELECT pg_advisory_lock($1)", _ADVISORY_LOCK_ID)
+        try:
+            await conn.execute(_CREATE_TABLE)
+            done: Set[int] = {
+                r["version"] for r in await conn.fetch("SELECT version FROM schema_migrations")
+            }
+            if baseline is None and not done:
+                has_schema = await conn.fetchval("SELECT to_regclass('orders') IS NOT NULL")
+                baseline = implicit_baseline(done, has_schema)
+            for migration in migrations:
+                if migration.version in done:
+                    continue
+                if baseline is not None and migration.version <= baseline:
+                    await _record(conn, migration)
+                    continue
+                if migration.transactional:
+                    async with conn.transaction():
+                        await conn.execute(migration.sql)
+                        await _record(conn, migration)
+                else:
+                    for statement in migration.statements():
+                        await conn.execute(statement)
+                    await _record(conn, migration)
+                applied.append(migration)
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", _ADVISORY_LOCK_ID)
+    return applied
+
+
+def implicit_baseline(done: Set[int], has_schema: bool) -> Optional[int]:
+    """Baseline for a database whose schema predates the migration ledger."""
+    if not done and has_schema:
+        return PRE_LEDGER_BASELINE
+    return None
+
+
+async def _record(conn, migration: Migration) -> None:
+    await conn.execute(
+        "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)",
+        migration.version,
+        migration.name,
+    )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        applied = await migrate(get_engine(), Path(args.dir), args.baseline)
+    finally:
+        await dispose_engine()
+    for migration in applied:
+        print(f"applied {migration.name}")
+    if not applied:
+        print("database is up to date")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", default=str(MIGRATIONS_DIR), help="migrations directory")
+    parser.add_argument(
+        "--baseline",
+        type=int,
+        help="record versions up to this one as applied without running them",
+    )
+    asyncio.run(_main(parser.parse_args()))
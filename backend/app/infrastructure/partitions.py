@@ -0,0 +1,127 @@
+"""Maintenance of the monthly order_status_history partitions.
+
+The app creates upcoming partitions at startup and then every
+`MAINTENANCE_INTERVAL` seconds while it runs; the ``ensure`` command does
+the same from cron for deployments that restart rarely or run no app.
+
+Usage::
+
+    python -m app.infrastructure.partitions ensure --months-ahead 3
+    python -m app.infrastructure.partitions archive --retain-months 12
+"""
+
+import argparse
+import asyncio
+import logging
+import re
+from datetime import date
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .db import dispose_engine, get_engine
+
+ARCHIVE_SCHEMA = "archive"
+
+MONTHS_AHEAD = 3
+MAINTENANCE_INTERVAL = 6 * 3600
+
+logger = logging.getLogger(__name__)
+
+_PARTITION_RE = re.compile(r"^order_status_history_y(\d{4})m(\d{2})$")
+
+
+async def ensure_history_partitions(engine: AsyncEngine, months_ahead: int = MONTHS_AHEAD) -> None:
+    """Create partitions from the current month `months_ahead` months ahead.
+
+    Rows land in the default partition only when this has not run in time;
+    they are moved into their month's partition when it is created
+    (migration 009).
+    """
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("SELECT ensure_order_status_history_partitions(:months_ahead)"),
+            {"months_ahead": months_ahead},
+        )
+
+
+async def maintain_history_partitions(
+    engine: AsyncEngine,
+    interval: float = MAINTENANCE_INTERVAL,
+    months_ahead: int = MONTHS_AHEAD,
+) -> None:
+    """Run `ensure_history_partitions` every `interval` seconds until cancelled.
+
+    A failed run is logged and retried on the next tick.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await ensure_history_partitions(engine, months_ahead)
+        except Exception:
+            logger.exception("Could not create order_status_history partitions")
+
+
+async def archive_history_partitions(engine: AsyncEngine, before: date) -> List[str]:
+    """Detach partitions that end on or before `before` into the archive schema.
+
+    Each partition is detached and moved in its own short transaction, so
+    the lock on order_status_history is held for one partition at a time.
+    Returns the names of the archived partitions.
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        res = await conn.execute(text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'order_status_history'::regclass
+        """))
+        names = sorted(
+            name for (name,) in res
+            if (end := _partition_end(name)) is not None and end <= before
+        )
+
+    for name in names:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"ALTER TABLE order_status_history DETACH PARTITION {name}"))
+            await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+    return names
+
+
+def retention_cutoff(retain_months: int, today: date) -> date:
+    """First day of the oldest month that is kept."""
+    months = today.year * 12 + today.month - 1 - retain_months
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def _partition_end(name: str):
+    match = _PARTITION_RE.match(name)
+    if match is None:
+        return None
+    year, month = int(match.group(1)), int(match.group(2))
+    return date(year + month // 12, month % 12 + 1, 1)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    engine = get_engine()
+    try:
+        if args.command == "ensure":
+            await ensure_history_partitions(engine, args.months_ahead)
+        else:
+            cutoff = retention_cutoff(args.retain_months, date.today())
+            for name in await archive_history_partitions(engine, cutoff):
+                print(f"archived {name}")
+    finally:
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure = commands.add_parser("ensure", help="create upcoming monthly partitions")
+    ensure.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    archive = commands.add_parser("archive", help="detach old partitions into the archive schema")
+    archive.add_argument("--retain-months", type=int, default=12)
+    asyncio.run(_main(parser.parse_args()))
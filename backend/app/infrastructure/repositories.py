@@ -1,15 +1,19 @@
 """Реализация репозиториев с использованием SQLAlchemy."""
 
+import functools
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
-from decimal import Decimal
-from typing import Optional, List
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Set, Tuple
 
-from sqlalchemy import text
+from sqlalchemy import JSON, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.user import User
+from app.domain.money import Money
 from app.domain.order import Order, OrderItem, OrderStatus, OrderStatusChange
+from app.domain.queries import ORDER_INCLUDES, OrderFilter, Page, PageKey
+from app.domain.exceptions import OrderVersionConflictError
 
 
 class UserRepository:
@@ -21,14 +25,15 @@ class UserRepository:
     # TODO: Реализовать save(user: User) -> None
     # Используйте INSERT ... ON CONFLICT DO UPDATE
     async def save(self, user: User) -> None:
-        await self.session.execute(
+        res = await self.session.execute(
             text("""
                 INSERT INTO users (id, email, name, created_at)
                 VALUES (:id, :email, :name, :created_at)
                 ON CONFLICT (id) DO UPDATE SET
                     email = EXCLUDED.email,
-                    name = EXCLUDED.name
-                RETURNING id
+                    name = EXCLUDED.name,
+                    version = users.version + 1
+                RETURNING version
             """),
             {
                 "id": user.id,
@@ -37,8 +42,7 @@ class UserRepository:
                 "created_at": user.created_at
             },
         )
-
-        await self.session.commit()
+        user.version = res.scalar_one()
 
     # TODO: Реализовать find_by_id(user_id: UUID) -> Optional[User]
     async def find_by_id(self, user_id: uuid.UUID) -> Optional[User]:
@@ -48,16 +52,11 @@ class UserRepository:
                 "user_id": user_id
             }
         )
-        row = res.fetchone()
+        row = res.mappings().fetchone()
         if not row:
             return None
         
-        return User(
-            id=row.id,
-            email=row.email,
-            name=row.name,
-            created_at=row.created_at
-        )
+        return _user_from_row(row)
 
     # TODO: Реализовать find_by_email(email: str) -> Optional[User]
     async def find_by_email(self, email: str) -> Optional[User]:
@@ -67,273 +66,740 @@ class UserRepository:
                 "email": email
             }
         )
-        row = res.fetchone()
+        row = res.mappings().fetchone()
         if not row:
             return None
         
-        return User(
-            id=row.id,
-            email=row.email,
-            name=row.name,
-            created_at=row.created_at
-        )
+        return _user_from_row(row)
 
     # TODO: Реализовать find_all() -> List[User]
     async def find_all(self) -> List[User]:
         res = await self.session.execute(
             text("SELECT * FROM users")
         )
-        rows = res.fetchall()
-        return [
-            User(
-                id=row.id,
-                email=row.email,
-                name=row.name,
-                created_at=row.created_at
-            )
-            for row in rows
-        ]
+        rows = res.mappings().all()
+        return [_user_from_row(row) for row in rows]
+
+    async def find_page(self, limit: int, after: Optional[PageKey] = None) -> Page[User]:
+        """Страница пользователей в порядке (created_at, id) после ключа `after`."""
+        conditions: List[str] = []
+        params: Dict[str, Any] = {}
+        _add_keyset_condition(conditions, params, after)
+        res = await self.session.execute(
+            text(_page_query("users", conditions)),
+            {**params, "limit": limit + 1}
+        )
+        rows = res.mappings().all()
+        users = [_user_from_row(row) for row in rows[:limit]]
+        return Page(users, _next_key(rows, limit))
+
+    async def get_version(self, user_id: uuid.UUID) -> Optional[int]:
+        """Версия пользователя без загрузки строки целиком."""
+        res = await self.session.execute(
+            text("SELECT version FROM users WHERE id = :user_id"),
+            {"user_id": user_id}
+        )
+        return res.scalar_one_or_none()
+
+    async def find_page_versions(
+        self,
+        limit: int,
+        after: Optional[PageKey] = None,
+    ) -> List[Tuple[uuid.UUID, int]]:
+        """Пары (id, version) той же страницы, что вернёт find_page.
+
+        Включает строку сверх лимита, чтобы учитывать и наличие следующей
+        страницы.
+        """
+        conditions: List[str] = []
+        params: Dict[str, Any] = {}
+        _add_keyset_condition(conditions, params, after)
+        res = await self.session.execute(
+            text(_page_query("users", conditions, columns="id, version")),
+            {**params, "limit": limit + 1}
+        )
+        return [tuple(row) for row in res]
+
+    async def insert_many(self, users: List[User]) -> Set[uuid.UUID]:
+        """Вставить пачку пользователей через COPY во временную таблицу.
+
+        Слияние с users выполняется одним INSERT ... ON CONFLICT (email)
+        DO NOTHING, поэтому дубликаты (и с базой, и внутри пачки) просто
+        пропускаются; из двух одинаковых email в пачке побеждает первый.
+        Возвращает id реально вставленных пользователей.
+        """
+        if not users:
+            return set()
+        # Первый execute открывает транзакцию, в которой затем идёт COPY.
+        await self.session.execute(text(_CREATE_USERS_STAGING))
+        connection = await self.session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "users_import",
+            records=[
+                (n, u.id, u.email, u.name, u.created_at)
+                for n, u in enumerate(users)
+            ],
+            columns=["n", "id", "email", "name", "created_at"],
+        )
+        res = await self.session.execute(
+            text("""
+                INSERT INTO users (id, email, name, created_at)
+                SELECT id, email, name, created_at
+                FROM users_import
+                ORDER BY n
+                ON CONFLICT (email) DO NOTHING
+                RETURNING id
+            """)
+        )
+        inserted = {row[0] for row in res}
+        await self.session.execute(text("TRUNCATE users_import"))
+        return inserted
 
 
 class OrderRepository:
-    """Репозиторий для Order."""
+    """Репозиторий для Order.
+
+    Запоминает состояние загруженных и сохранённых заказов, чтобы save()
+    записывал только новые или изменившиеся строки. Историю статусов
+    пишут триггеры на orders, поэтому save() её не вставляет.
+    """
 
     def __init__(self, session: AsyncSession):
         self.session = session
+        self._snapshots: Dict[uuid.UUID, _OrderSnapshot] = {}
 
     # TODO: Реализовать save(order: Order) -> None
     # Сохранить заказ, товары и историю статусов
     async def save(self, order: Order) -> None:
-        await self.session.execute(
-            text("""
-                INSERT INTO orders (user_id, id, status, total_amount, created_at)
-                VALUES (:user_id, :id, :status, :total_amount, :created_at)
-                ON CONFLICT (id)
-                DO UPDATE SET 
-                    status = EXCLUDED.status,
-                    total_amount = EXCLUDED.total_amount
-                RETURNING id
-            """),
-            {
-                "user_id": order.user_id,
-                "id": order.id,
-                "status": order.status,
-                "total_amount": order.total_amount,
-                "created_at": order.created_at
-            }
-        )
+        snapshot = self._snapshots.get(order.id)
 
+        known_items = snapshot.items if snapshot else {}
+        new_items = []
+        changed_items = []
         for item in order.items:
-            await self.session.execute(
+            known_state = known_items.get(item.id)
+            if known_state is None:
+                new_items.append(item)
+            elif known_state != _item_state(item):
+                changed_items.append(item)
+
+        # total_amount ведут триггеры order_items (миграция 004): новый заказ
+        # вставляется с нулевой суммой, а вставка товаров добавляет дельту.
+        if snapshot is None:
+            res = await self.session.execute(
                 text("""
-                    INSERT INTO order_items (product_name, price, quantity, id, order_id)
-                    VALUES (:product_name, :price, :quantity, :id, :order_id)
-                    ON CONFLICT (id) DO NOTHING
+                    INSERT INTO orders (user_id, id, status, total_amount, created_at)
+                    VALUES (:user_id, :id, :status, 0, :created_at)
+                    ON CONFLICT (id)
+                    DO UPDATE SET 
+                        status = EXCLUDED.status,
+                        version = orders.version + 1
+                    RETURNING version
                 """),
                 {
-                    "product_name": item.product_name,
-                    "price": item.price,
-                    "quantity": item.quantity,
-                    "id": item.id,
-                    "order_id": item.order_id
+                    "user_id": order.user_id,
+                    "id": order.id,
+                    "status": order.status.value,
+                    "created_at": order.created_at
                 }
             )
-        
-        for log in order.status_history:
-            await self.session.execute(
-                text("""
-                    INSERT INTO order_status_history (order_id, status, changed_at, id)
-                    VALUES (:order_id, :status, :changed_at, :id)
-                    ON CONFLICT (id) DO NOTHING
-                """),
+            order.version = res.scalar_one()
+        elif snapshot.state != _order_state(order) or new_items or changed_items:
+            # Любое изменение товаров тоже меняет версию: иначе товар с
+            # нулевой ценой не изменил бы ни сумму, ни ETag заказа.
+            status_changed = snapshot.state[0] != order.status
+            res = await self.session.execute(
+                _UPDATE_ORDER_STATUS if status_changed else _BUMP_ORDER_VERSION,
                 {
-                    "order_id": log.order_id,
-                    "status": log.status,
-                    "changed_at": log.changed_at,
-                    "id": log.id
+                    "id": order.id,
+                    "status": order.status.value,
+                    "version": order.version
                 }
             )
+            version = res.scalar_one_or_none()
+            if version is None:
+                raise OrderVersionConflictError(order.id)
+            order.version = version
 
-        await self.session.commit()
+        await self._insert_items(new_items)
+        await self._update_items(changed_items)
 
+        self._remember(order)
 
-    # TODO: Реализовать find_by_id(order_id: UUID) -> Optional[Order]
-    # Загрузить заказ со всеми товарами и историей
-    # Используйте object.__new__(Order) чтобы избежать __post_init__
-    async def find_by_id(self, order_id: uuid.UUID) -> Optional[Order]:
-        order_res = await self.session.execute(
-            text("SELECT * FROM orders WHERE id = :order_id"),
+    async def _insert_items(self, items: List[OrderItem]) -> None:
+        """Вставить товары одним многострочным INSERT через unnest()."""
+        if not items:
+            return
+        await self.session.execute(
+            text("""
+                INSERT INTO order_items (id, order_id, product_name, price, quantity)
+                SELECT id, order_id, product_name, price_cents / 100.0, quantity
+                FROM unnest(
+                    CAST(:ids AS uuid[]),
+                    CAST(:order_ids AS uuid[]),
+                    CAST(:product_names AS varchar[]),
+                    CAST(:price_cents AS bigint[]),
+                    CAST(:quantities AS integer[])
+                ) AS c(id, order_id, product_name, price_cents, quantity)
+                ON CONFLICT (id) DO NOTHING
+            """),
             {
-                "order_id": order_id
+                "ids": [item.id for item in items],
+                "order_ids": [item.order_id for item in items],
+                "product_names": [item.product_name for item in items],
+                "price_cents": [item.price.cents for item in items],
+                "quantities": [item.quantity for item in items]
             }
         )
-        order = order_res.mappings().fetchone()
-        if order is None:
-            return None
 
-        items_res = await self.session.execute(
-            text("SELECT * FROM order_items WHERE order_id = :order_id"),
+    async def _update_items(self, items: List[OrderItem]) -> None:
+        """Обновить изменившиеся товары одним UPDATE ... FROM unnest()."""
+        if not items:
+            return
+        await self.session.execute(
+            text("""
+                UPDATE order_items AS i
+                SET product_name = c.product_name,
+                    price = c.price_cents / 100.0,
+                    quantity = c.quantity
+                FROM unnest(
+                    CAST(:ids AS uuid[]),
+                    CAST(:product_names AS varchar[]),
+                    CAST(:price_cents AS bigint[]),
+                    CAST(:quantities AS integer[])
+                ) AS c(id, product_name, price_cents, quantity)
+                WHERE i.id = c.id
+            """),
             {
-                "order_id": order_id
+                "ids": [item.id for item in items],
+                "product_names": [item.product_name for item in items],
+                "price_cents": [item.price.cents for item in items],
+                "quantities": [item.quantity for item in items]
             }
         )
-        items_rows = items_res.mappings().all()
-        items = [
-            OrderItem(
-                product_name=row.product_name,
-                price=Decimal(str(row.price)),
-                quantity=row.quantity,
-                id=row.id,
-                order_id=row.order_id
-            )
-            for row in items_rows
-        ]
 
-        history_res = await self.session.execute(
-            text("SELECT * FROM order_status_history WHERE order_id = :order_id"),
+    async def pay(self, order_id: uuid.UUID) -> Optional[Order]:
+        """Оплатить заказ одним условным UPDATE.
+
+        Заказ переводится в paid только из created; None означает, что
+        такого заказа нет или он уже не в статусе created. Запись в истории
+        создаёт триггер, поэтому возвращаемый заказ содержит товары, но не
+        историю, и не запоминается для save().
+        """
+        res = await self.session.execute(_PAY_ORDER, {"order_id": order_id})
+        row = res.mappings().fetchone()
+        if row is None:
+            return None
+        return _order_from_row(row, [_item_from_row(item) for item in row['items']], [])
+
+    async def transition_many(
+        self,
+        target: OrderStatus,
+        allowed: FrozenSet[OrderStatus],
+        order_ids: Optional[List[uuid.UUID]] = None,
+        filter: Optional[OrderFilter] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[uuid.UUID, Optional[OrderStatus], bool]]:
+        """Перевести заказы в `target` одним UPDATE ... WHERE status = ANY(allowed).
+
+        Заказы задаются списком `order_ids` или фильтром. Фильтр выбирает
+        только заказы в разрешённых статусах, не больше `limit` самых
+        старых, поэтому повторный вызов переводит следующие. Для каждого
+        заказа возвращается (id, статус до перехода или None, если заказа
+        нет, переведён ли). История пишется триггером уровня оператора
+        (миграция 008) одним INSERT.
+        """
+        if order_ids is not None:
+            matched = """
+                SELECT r.id, r.n, o.status
+                FROM unnest(CAST(:ids AS uuid[])) WITH ORDINALITY AS r(id, n)
+                LEFT JOIN orders o ON o.id = r.id
+            """
+            params: Dict[str, Any] = {"ids": order_ids}
+        else:
+            conditions, params = _order_conditions(filter or OrderFilter())
+            conditions.append("status = ANY(CAST(:allowed AS order_status[]))")
+            matched = f"""
+                SELECT id, row_number() OVER (ORDER BY created_at, id) AS n, status
+                FROM orders
+                WHERE {" AND ".join(conditions)}
+                ORDER BY created_at, id
+                {"LIMIT :limit" if limit is not None else ""}
+            """
+            if limit is not None:
+                params["limit"] = limit
+        res = await self.session.execute(
+            text(_TRANSITION_ORDERS.format(matched=matched)),
             {
-                "order_id": order_id
+                **params,
+                "target": target.value,
+                "allowed": [status.value for status in allowed],
             }
         )
-        history_rows = history_res.mappings().all()
-        history = [
-            OrderStatusChange(
-                order_id=row.order_id,
-                status=OrderStatus(row.status),
-                changed_at=row.changed_at,
-                id=row.id
-            )
-            for row in history_rows
+        rows = [
+            (row['id'], OrderStatus(row['status']) if row['status'] is not None else None, row['moved'])
+            for row in res.mappings().all()
         ]
+        for order_id, _, moved in rows:
+            if moved:
+                self._snapshots.pop(order_id, None)
+        return rows
 
-        order_obj = object.__new__(Order)
-        order_obj.id = order['id']
-        order_obj.user_id = order['user_id']
-        order_obj.status = OrderStatus(order['status'])
-        order_obj.total_amount = Decimal(str(order['total_amount']))
-        order_obj.created_at = order['created_at']
-        order_obj.items = items
-        order_obj.status_history = history
+    async def get_status(self, order_id: uuid.UUID) -> Optional[OrderStatus]:
+        """Текущий статус заказа без загрузки агрегата."""
+        res = await self.session.execute(
+            text("SELECT status FROM orders WHERE id = :order_id"),
+            {"order_id": order_id}
+        )
+        status = res.scalar_one_or_none()
+        return OrderStatus(status) if status is not None else None
+
+    def _remember(self, order: Order) -> Order:
+        """Запомнить сохранённое в БД состояние заказа."""
+        self._snapshots[order.id] = _OrderSnapshot(
+            state=_order_state(order),
+            items={item.id: _item_state(item) for item in order.items},
+        )
+        return order
+
+    def _remember_full(self, order: Order, include: FrozenSet[str]) -> Order:
+        return self._remember(order) if include >= ORDER_INCLUDES else order
+
+    # TODO: Реализовать find_by_id(order_id: UUID) -> Optional[Order]
+    # Загрузить заказ со всеми товарами и историей
+    # Используйте object.__new__(Order) чтобы избежать __post_init__
+    async def find_by_id(
+        self,
+        order_id: uuid.UUID,
+        include: FrozenSet[str] = ORDER_INCLUDES,
+    ) -> Optional[Order]:
+        """Заказ с коллекциями из `include`; остальные не запрашиваются.
+
+        Неполный заказ не запоминается для save().
+        """
+        order_res = await self.session.execute(
+            _order_by_id_query(include),
+            {
+                "order_id": order_id
+            }
+        )
+        order = order_res.mappings().fetchone()
+        if order is None:
+            return None
 
-        return order_obj
+        return self._remember_full(_order_from_row(
+            order,
+            [_item_from_row(row) for row in order['items']] if "items" in include else [],
+            [_status_change_from_row(row) for row in order['history']] if "history" in include else [],
+        ), include)
 
     # TODO: Реализовать find_by_user(user_id: UUID) -> List[Order]
     async def find_by_user(self, user_id: uuid.UUID) -> List[Order]:
         user_orders = await self.session.execute(
-            text("SELECT * FROM orders WHERE user_id = :user_id"),
+            text(f"SELECT {_order_columns()} FROM orders WHERE user_id = :user_id"),
             {
                 "user_id": user_id
             }
         )
-        user_orders_rows = user_orders.mappings().all()
-
-        all_user_orders = []
-        
-        for order in user_orders_rows:
-            order_id = order['id']
-            items_res = await self.session.execute(
-                text("SELECT * FROM order_items WHERE order_id = :order_id"),
-                {
-                    "order_id": order_id
-                }
-            )
-            items_rows = items_res.mappings().all()
-            items = [
-                OrderItem(
-                    product_name=row.product_name,
-                    price=Decimal(str(row.price)),
-                    quantity=row.quantity,
-                    id=row.id,
-                    order_id=row.order_id
-                )
-                for row in items_rows
-            ]
-
-            history_res = await self.session.execute(
-                text("SELECT * FROM order_status_history WHERE order_id = :order_id"),
-                {
-                    "order_id": order_id
-                }
-            )
-            history_rows = history_res.mappings().all()
-            history = [
-                OrderStatusChange(
-                    order_id=row.order_id,
-                    status=OrderStatus(row.status),
-                    changed_at=row.changed_at,
-                    id=row.id
-                )
-                for row in history_rows
-            ]
-
-            order_obj = object.__new__(Order)
-            order_obj.id = order['id']
-            order_obj.user_id = order['user_id']
-            order_obj.status = OrderStatus(order['status'])
-            order_obj.total_amount = Decimal(str(order['total_amount']))
-            order_obj.created_at = order['created_at']
-            order_obj.items = items
-            order_obj.status_history = history
-
-            all_user_orders.append(order_obj)
-
-        return all_user_orders
+        return await self._load_orders(user_orders.mappings().all())
 
 
     # TODO: Реализовать find_all() -> List[Order]
     async def find_all(self) -> List[Order]:
         orders_res = await self.session.execute(
-            text("SELECT * FROM orders")
+            text(f"SELECT {_order_columns()} FROM orders")
+        )
+        return await self._load_orders(orders_res.mappings().all())
+
+    async def find_page(
+        self,
+        filter: OrderFilter,
+        limit: int,
+        after: Optional[PageKey] = None,
+        include: FrozenSet[str] = ORDER_INCLUDES,
+    ) -> Page[Order]:
+        """Страница заказов в порядке (created_at, id) после ключа `after`."""
+        conditions, params = _order_conditions(filter)
+        _add_keyset_condition(conditions, params, after)
+        orders_res = await self.session.execute(
+            text(_page_query("orders", conditions, columns=_order_columns())),
+            {**params, "limit": limit + 1}
         )
         orders_rows = orders_res.mappings().all()
-        all_orders = []
+        orders = await self._load_orders(orders_rows[:limit], include)
+        return Page(orders, _next_key(orders_rows, limit))
+
+    async def find_page_versions(
+        self,
+        filter: OrderFilter,
+        limit: int,
+        after: Optional[PageKey] = None,
+    ) -> List[Tuple[uuid.UUID, int]]:
+        """Пары (id, version) той же страницы, что вернёт find_page.
+
+        Включает строку сверх лимита, чтобы учитывать и наличие следующей
+        страницы.
+        """
+        conditions, params = _order_conditions(filter)
+        _add_keyset_condition(conditions, params, after)
+        res = await self.session.execute(
+            text(_page_query("orders", conditions, columns="id, version")),
+            {**params, "limit": limit + 1}
+        )
+        return [tuple(row) for row in res]
+
+    async def get_version(self, order_id: uuid.UUID) -> Optional[int]:
+        """Версия заказа без загрузки агрегата."""
+        res = await self.session.execute(
+            text("SELECT version FROM orders WHERE id = :order_id"),
+            {"order_id": order_id}
+        )
+        return res.scalar_one_or_none()
+
+    async def stream(
+        self,
+        filter: OrderFilter,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Order]:
+        """Все заказы фильтра с товарами, без истории, через серверный курсор.
+
+        Строки читаются пачками по `batch_size`, поэтому память не зависит
+        от размера выборки. Требует открытой транзакции. Выгруженные заказы
+        не запоминаются для save().
+        """
+        conditions, params = _order_conditions(filter)
+        query = _orders_with_details(
+            " AND ".join(conditions) if conditions else "TRUE",
+            history=False,
+            suffix="ORDER BY o.created_at, o.id",
+        ).execution_options(yield_per=batch_size)
+        result = await self.session.stream(query, params)
+        async for row in result.mappings():
+            yield _order_from_row(
+                row,
+                [_item_from_row(item) for item in row['items']],
+                [],
+            )
 
-        for order in orders_rows:
-            order_id = order['id']
+    async def _load_orders(
+        self,
+        orders_rows,
+        include: FrozenSet[str] = ORDER_INCLUDES,
+    ) -> List[Order]:
+        """Собрать заказы с коллекциями из `include`.
+
+        Товары и история всех выбранных заказов загружаются двумя запросами
+        через `order_id = ANY(:ids)`, поэтому число запросов не зависит от
+        количества заказов. Невключённые коллекции не запрашиваются.
+        """
+        if not orders_rows:
+            return []
+
+        order_ids = [order['id'] for order in orders_rows]
+        items_by_order = {order_id: [] for order_id in order_ids}
+        history_by_order = {order_id: [] for order_id in order_ids}
+
+        if "items" in include:
             items_res = await self.session.execute(
-                text("SELECT * FROM order_items WHERE order_id = :order_id"),
+                text(f"SELECT {_ITEM_COLUMNS} FROM order_items WHERE order_id = ANY(:order_ids)"),
                 {
-                    "order_id": order_id
+                    "order_ids": order_ids
                 }
             )
-            items_rows = items_res.mappings().all()
-            items = [
-                OrderItem(
-                    product_name=row.product_name,
-                    price=Decimal(str(row.price)),
-                    quantity=row.quantity,
-                    id=row.id,
-                    order_id=row.order_id
-                )
-                for row in items_rows
-            ]
+            for row in items_res.mappings().all():
+                items_by_order[row['order_id']].append(_item_from_row(row))
 
+        if "history" in include:
             history_res = await self.session.execute(
-                text("SELECT * FROM order_status_history WHERE order_id = :order_id"),
+                text(f"""
+                    SELECT * FROM order_status_history
+                    WHERE order_id = ANY(:order_ids)
+                      AND changed_at >= CAST(:since AS timestamptz) - {_HISTORY_CLOCK_SKEW}
+                    ORDER BY changed_at
+                """),
                 {
-                    "order_id": order_id
+                    "order_ids": order_ids,
+                    "since": min(order['created_at'] for order in orders_rows)
                 }
             )
-            history_rows = history_res.mappings().all()
-            history = [
-                OrderStatusChange(
-                    order_id=row.order_id,
-                    status=OrderStatus(row.status),
-                    changed_at=row.changed_at,
-                    id=row.id
-                )
-                for row in history_rows
-            ]
-
-            order_obj = object.__new__(Order)
-            order_obj.id = order['id']
-            order_obj.user_id = order['user_id']
-            order_obj.status = OrderStatus(order['status'])
-            order_obj.total_amount = Decimal(str(order['total_amount']))
-            order_obj.created_at = order['created_at']
-            order_obj.items = items
-            order_obj.status_history = history
-
-            all_orders.append(order_obj)
-
-        return all_orders
\ No newline at end of file
+            for row in history_res.mappings().all():
+                history_by_order[row['order_id']].append(_status_change_from_row(row))
+
+        return [
+            self._remember_full(_order_from_row(
+                order,
+                items_by_order[order['id']],
+                history_by_order[order['id']],
+            ), include)
+            for order in orders_rows
+        ]
+
+
+def _order_conditions(filter: OrderFilter) -> Tuple[List[str], Dict[str, Any]]:
+    """SQL-условия и параметры для фильтра заказов."""
+    conditions: List[str] = []
+    params: Dict[str, Any] = {}
+    if filter.user_id is not None:
+        conditions.append("user_id = :user_id")
+        params["user_id"] = filter.user_id
+    if filter.status is not None:
+        conditions.append("status = :status")
+        params["status"] = filter.status.value
+    if filter.created_from is not None:
+        conditions.append("created_at >= :created_from")
+        params["created_from"] = filter.created_from
+    if filter.created_to is not None:
+        conditions.append("created_at < :created_to")
+        params["created_to"] = filter.created_to
+    if filter.min_total is not None:
+        conditions.append("total_amount >= :min_total")
+        params["min_total"] = filter.min_total
+    if filter.max_total is not None:
+        conditions.append("total_amount <= :max_total")
+        params["max_total"] = filter.max_total
+    return conditions, params
+
+
+# Временная таблица для COPY; живёт до конца транзакции импорта.
+_CREATE_USERS_STAGING = """
+    CREATE TEMP TABLE IF NOT EXISTS users_import (
+        n integer NOT NULL,
+        id uuid NOT NULL,
+        email varchar(50) NOT NULL,
+        name varchar(50),
+        created_at timestamptz NOT NULL
+    ) ON COMMIT DROP
+"""
+
+
+def _add_keyset_condition(
+    conditions: List[str],
+    params: Dict[str, Any],
+    after: Optional[PageKey],
+) -> None:
+    if after is not None:
+        conditions.append("(created_at, id) > (:after_created_at, :after_id)")
+        params["after_created_at"], params["after_id"] = after
+
+
+def _page_query(table: str, conditions: List[str], columns: str = "*") -> str:
+    where = " AND ".join(conditions) if conditions else "TRUE"
+    return f"""
+        SELECT {columns} FROM {table}
+        WHERE {where}
+        ORDER BY created_at, id
+        LIMIT :limit
+    """
+
+
+def _next_key(rows, limit: int) -> Optional[PageKey]:
+    """Ключ следующей страницы, если запрос вернул строку сверх лимита."""
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return (last['created_at'], last['id'])
+
+
+# Суммы читаются сразу в копейках: bigint из asyncpg дешевле NUMERIC,
+# который декодируется в Decimal через строку.
+def _order_columns(alias: str = "") -> str:
+    return (
+        f"{alias}id, {alias}user_id, {alias}status, {alias}created_at, {alias}version, "
+        f"({alias}total_amount * 100)::bigint AS total_cents"
+    )
+
+
+_ITEM_COLUMNS = "id, order_id, product_name, quantity, (price * 100)::bigint AS price_cents"
+
+
+# История не может быть раньше создания заказа; условие по changed_at
+# позволяет отсечь секции order_status_history за более ранние месяцы.
+# Запас покрывает расхождение часов приложения (created_at) и БД (NOW()).
+_HISTORY_CLOCK_SKEW = "INTERVAL '1 day'"
+
+# Коллекции заказа, собранные в JSON-массивы через LEFT JOIN LATERAL.
+_ITEMS_LATERAL = """
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(json_agg(json_build_object(
+            'id', i.id,
+            'order_id', i.order_id,
+            'product_name', i.product_name,
+            'price_cents', (i.price * 100)::bigint,
+            'quantity', i.quantity
+        )), '[]') AS items
+        FROM order_items i
+        WHERE i.order_id = o.id
+    ) items ON TRUE
+"""
+
+_HISTORY_LATERAL = f"""
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(json_agg(json_build_object(
+            'id', h.id,
+            'order_id', h.order_id,
+            'status', h.status,
+            'changed_at', h.changed_at
+        ) ORDER BY h.changed_at), '[]') AS history
+        FROM order_status_history h
+        WHERE h.order_id = o.id
+          AND h.changed_at >= o.created_at - {_HISTORY_CLOCK_SKEW}
+    ) history ON TRUE
+"""
+
+
+def _orders_with_details(
+    where: str,
+    items: bool = True,
+    history: bool = True,
+    suffix: str = "",
+):
+    """Заказы вместе с товарами и историей (если нужны) одним запросом."""
+    columns = [_order_columns("o.")]
+    joins = []
+    types = {}
+    if items:
+        columns.append("items.items")
+        joins.append(_ITEMS_LATERAL)
+        types["items"] = JSON
+    if history:
+        columns.append("history.history")
+        joins.append(_HISTORY_LATERAL)
+        types["history"] = JSON
+    return text(f"""
+        SELECT {", ".join(columns)}
+        FROM orders o
+        {"".join(joins)}
+        WHERE {where}
+        {suffix}
+    """).columns(**types)
+
+
+@functools.lru_cache(maxsize=None)
+def _order_by_id_query(include: FrozenSet[str]):
+    return _orders_with_details(
+        "o.id = :order_id",
+        items="items" in include,
+        history="history" in include,
+    )
+
+# Статус задаётся только при его изменении: триггер проверки повторной
+# оплаты (UPDATE OF status) срабатывает, даже если значение то же.
+_UPDATE_ORDER_STATUS = text("""
+    UPDATE orders
+    SET status = :status,
+        version = version + 1
+    WHERE id = :id AND version = :version
+    RETURNING version
+""")
+
+_BUMP_ORDER_VERSION = text("""
+    UPDATE orders
+    SET version = version + 1
+    WHERE id = :id AND version = :version
+    RETURNING version
+""")
+
+_PAY_ORDER = text(f"""
+    WITH o AS (
+        UPDATE orders
+        SET status = 'paid', version = version + 1
+        WHERE id = :order_id AND status = 'created'
+        RETURNING *
+    )
+    SELECT {_order_columns("o.")}, items.items
+    FROM o
+    {_ITEMS_LATERAL}
+""").columns(items=JSON)
+
+
+# matched: (id, n, status) выбранных заказов в порядке n. Условие на
+# o.status перепроверяется в UPDATE, поэтому заказ, изменённый
+# параллельно, не будет переведён из неразрешённого статуса.
+_TRANSITION_ORDERS = """
+    WITH matched AS ({matched}),
+    moved AS (
+        UPDATE orders o
+        SET status = CAST(:target AS order_status), version = o.version + 1
+        FROM matched m
+        WHERE o.id = m.id AND o.status = ANY(CAST(:allowed AS order_status[]))
+        RETURNING o.id
+    )
+    SELECT m.id, m.status, moved.id IS NOT NULL AS moved
+    FROM matched m
+    LEFT JOIN moved ON moved.id = m.id
+    ORDER BY m.n
+"""
+
+
+@dataclass(frozen=True)
+class _OrderSnapshot:
+    """Состояние заказа на момент последней загрузки или сохранения."""
+
+    state: Tuple
+    items: Dict[uuid.UUID, Tuple]
+
+
+def _order_state(order: Order) -> Tuple:
+    return (order.status, order.total_amount)
+
+
+def _item_state(item: OrderItem) -> Tuple:
+    return (item.product_name, item.price, item.quantity)
+
+
+def _as_uuid(value) -> uuid.UUID:
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(value)
+
+
+def _as_datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def _user_from_row(row) -> User:
+    return User.restore(
+        id=row['id'],
+        email=row['email'],
+        name=row['name'],
+        created_at=row['created_at'],
+        version=row['version'],
+    )
+
+
+def _item_from_row(row) -> OrderItem:
+    """Товар заказа из строки order_items или из JSON-объекта."""
+    return OrderItem.restore(
+        id=_as_uuid(row['id']),
+        order_id=_as_uuid(row['order_id']),
+        product_name=row['product_name'],
+        price=Money(row['price_cents']),
+        quantity=row['quantity'],
+    )
+
+
+def _status_change_from_row(row) -> OrderStatusChange:
+    """Запись истории из строки order_status_history или из JSON-объекта."""
+    return OrderStatusChange.restore(
+        id=_as_uuid(row['id']),
+        order_id=_as_uuid(row['order_id']),
+        status=OrderStatus(row['status']),
+        changed_at=_as_datetime(row['changed_at']),
+    )
+
+
+def _order_from_row(
+    row,
+    items: List[OrderItem],
+    history: List[OrderStatusChange],
+) -> Order:
+    """Собрать Order из строки orders."""
+    return Order.restore(
+        id=row['id'],
+        user_id=row['user_id'],
+        status=OrderStatus(row['status']),
+        total_amount=Money(row['total_cents']),
+        created_at=row['created_at'],
+        version=row['version'],
+        items=items,
+        status_history=history,
+    )
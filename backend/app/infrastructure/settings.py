@@ -0,0 +1,129 @@
+"""Database settings read from environment variables."""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.getenv(name, default)
+
+
+def _env_optional_str(name: str) -> Optional[str]:
+    value = os.getenv(name)
+    return value or None
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value is None or value == "" else int(value)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return default if value is None or value == "" else float(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """Engine and connection pool configuration.
+
+    Every field can be overridden with the environment variable named in
+    `from_env()`.
+    """
+
+    url: str = "postgresql+asyncpg://postgres:postgres@db:5432/marketplace"
+    # Optional read replica for read-only requests, and how long a read
+    # carrying a consistency token may wait for it before using the primary.
+    read_url: Optional[str] = None
+    replica_wait_timeout: float = 0.0
+    echo: bool = False
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    statement_cache_size: int = 100
+    pool_warmup: int = -1
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        defaults = cls()
+        return cls(
+            url=_env_str("DATABASE_URL", defaults.url),
+            read_url=_env_optional_str("READ_DATABASE_URL"),
+            replica_wait_timeout=_env_float(
+                "REPLICA_WAIT_TIMEOUT", defaults.replica_wait_timeout
+            ),
+            echo=_env_bool("DB_ECHO", defaults.echo),
+            pool_size=_env_int("DB_POOL_SIZE", defaults.pool_size),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", defaults.max_overflow),
+            pool_timeout=_env_float("DB_POOL_TIMEOUT", defaults.pool_timeout),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", defaults.pool_recycle),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", defaults.pool_pre_ping),
+            statement_cache_size=_env_int(
+                "DB_STATEMENT_CACHE_SIZE", defaults.statement_cache_size
+            ),
+            pool_warmup=_env_int("DB_POOL_WARMUP", defaults.pool_warmup),
+        )
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.url.startswith("sqlite")
+
+    @property
+    def warmup_connections(self) -> int:
+        """Connections to open at startup; defaults to the full pool."""
+        if self.is_sqlite:
+            return 0
+        return self.pool_size if self.pool_warmup < 0 else self.pool_warmup
+
+    def engine_options(self) -> Dict[str, Any]:
+        """Keyword arguments for `create_async_engine`."""
+        if self.is_sqlite:
+            return {"echo": self.echo}
+        return {
+            "echo": self.echo,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+            "connect_args": {
+                "statement_cache_size": self.statement_cache_size,
+                "prepared_statement_cache_size": self.statement_cache_size,
+            },
+        }
+
+
+@dataclass(frozen=True)
+class CacheSettings:
+    """In-process cache for users and orders.
+
+    TTLs are in seconds. Orders in a terminal status (completed, cancelled)
+    use `terminal_order_ttl`; `max_entries=0` disables a cache.
+    """
+
+    max_entries: int = 10_000
+    user_ttl: float = 60.0
+    order_ttl: float = 5.0
+    terminal_order_ttl: float = 3600.0
+
+    @classmethod
+    def from_env(cls) -> "CacheSettings":
+        defaults = cls()
+        return cls(
+            max_entries=_env_int("CACHE_MAX_ENTRIES", defaults.max_entries),
+            user_ttl=_env_float("CACHE_USER_TTL", defaults.user_ttl),
+            order_ttl=_env_float("CACHE_ORDER_TTL", defaults.order_ttl),
+            terminal_order_ttl=_env_float(
+                "CACHE_TERMINAL_ORDER_TTL", defaults.terminal_order_ttl
+            ),
+        )
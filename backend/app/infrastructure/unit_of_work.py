@@ -0,0 +1,150 @@
+"""Unit of work: a single transaction per request."""
+
+import asyncio
+import re
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import (
+    SessionLocal,
+    ReadSessionLocal,
+    ReplicaSessionLocal,
+    init_engine,
+    get_read_engine,
+    get_settings,
+    has_read_replica,
+    current_wal_lsn,
+    replica_has_replayed,
+)
+from .repositories import UserRepository, OrderRepository
+from .cache import cached_repositories
+
+# Clients echo the token from a write response back on their next read.
+CONSISTENCY_TOKEN_HEADER = "X-Consistency-Token"
+
+_LSN_RE = re.compile(r"^[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}$")
+
+
+class UnitOfWork:
+    """Owns the session transaction; repositories only stage writes in it.
+
+    Repositories are wrapped with the process-wide caches; entries written
+    in the transaction are invalidated once it ends. Reads bypass the
+    caches unless `use_cache` (`use_user_cache` for users) is set, and only
+    fill them with `fill_cache`, which is meant for sessions on the primary.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        use_cache: bool = False,
+        fill_cache: bool = False,
+        use_user_cache: Optional[bool] = None,
+    ):
+        self.session = session
+        self.users, self.orders = cached_repositories(
+            UserRepository(session),
+            OrderRepository(session),
+            use_cache,
+            fill_cache,
+            use_user_cache,
+        )
+
+    async def commit(self) -> None:
+        try:
+            await self.session.commit()
+        finally:
+            self._end_transaction()
+
+    async def rollback(self) -> None:
+        try:
+            await self.session.rollback()
+        finally:
+            self._end_transaction()
+
+    def _end_transaction(self) -> None:
+        self.users.end_transaction()
+        self.orders.end_transaction()
+
+
+async def get_uow(request: Request) -> AsyncIterator[UnitOfWork]:
+    """Dependency for write requests: commits exactly once on success.
+
+    Orders are read past the caches, so writes start from the current rows.
+    Users may come from the cache: services only check that the user
+    exists, users are never deleted and the foreign key still guards the
+    insert. With a read replica configured, the primary WAL position after
+    the commit is stored in `request.state.consistency_token` so it can be
+    returned to the client.
+    """
+    init_engine()
+    async with SessionLocal() as session:
+        uow = UnitOfWork(session, use_user_cache=not has_read_replica())
+        try:
+            yield uow
+            await uow.commit()
+        except Exception:
+            await uow.rollback()
+            raise
+        if has_read_replica():
+            request.state.consistency_token = await current_wal_lsn(session)
+
+
+async def get_read_uow(request: Request) -> AsyncIterator[UnitOfWork]:
+    """Dependency for read-only requests: autocommit, no transaction.
+
+    Reads go to the replica unless the client sent a consistency token the
+    replica has not replayed within `replica_wait_timeout`; those reads are
+    served by the primary instead.
+
+    Reads without a token are served from the caches and fill them. With
+    a replica the caches are off: replica rows may lag behind the primary
+    and must not be cached, and no other reads could fill them. Reads with
+    a token bypass the caches: an entry cached before the client's write,
+    or by another process, may be older than what the client has seen.
+    """
+    init_engine()
+    token = request.headers.get(CONSISTENCY_TOKEN_HEADER)
+    if not token or not _LSN_RE.match(token):
+        cached = not has_read_replica()
+        async with ReplicaSessionLocal() as session:
+            yield UnitOfWork(session, use_cache=cached, fill_cache=cached)
+        return
+
+    if not has_read_replica():
+        async with ReplicaSessionLocal() as session:
+            yield UnitOfWork(session)
+        return
+
+    async with ReplicaSessionLocal() as session:
+        if await _wait_for_replica(session, token):
+            yield UnitOfWork(session)
+            return
+
+    async with ReadSessionLocal() as session:
+        yield UnitOfWork(session)
+
+
+@asynccontextmanager
+async def streaming_read_uow() -> AsyncIterator[UnitOfWork]:
+    """Unit of work for long reads through server-side cursors.
+
+    Server-side cursors only live inside a transaction, so unlike
+    `get_read_uow` this opens one on the replica; it is rolled back when
+    the session closes.
+    """
+    async with AsyncSession(get_read_engine(), expire_on_commit=False) as session:
+        yield UnitOfWork(session)
+
+
+async def _wait_for_replica(session: AsyncSession, token: str) -> bool:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + get_settings().replica_wait_timeout
+    while not await replica_has_replayed(session, token):
+        if loop.time() >= deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
@@ -1,14 +1,48 @@
 """Main FastAPI application."""
 
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import router
+from app.api.middleware import ConsistencyTokenMiddleware, MetricsMiddleware
+from app.infrastructure.db import init_engine, warm_up_pool, dispose_engine
+from app.infrastructure.partitions import ensure_history_partitions, maintain_history_partitions
+from app.infrastructure.cache import configure_caches
+from app.infrastructure import metrics
+from app.infrastructure.settings import CacheSettings, DatabaseSettings
+from app.infrastructure.unit_of_work import CONSISTENCY_TOKEN_HEADER
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the engine and warm up the pool before serving requests.
+
+    While serving, upcoming history partitions are created periodically.
+    """
+    configure_caches(CacheSettings.from_env())
+    settings = DatabaseSettings.from_env()
+    engine = init_engine(settings)
+    maintenance = None
+    if not settings.is_sqlite:
+        await ensure_history_partitions(engine)
+        maintenance = asyncio.create_task(maintain_history_partitions(engine))
+    await warm_up_pool(settings.warmup_connections)
+    yield
+    if maintenance is not None:
+        maintenance.cancel()
+        with suppress(asyncio.CancelledError):
+            await maintenance
+    await dispose_engine()
+
 
 app = FastAPI(
     title="Marketplace API",
     description="DDD-based marketplace API for lab work",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS for frontend
@@ -18,7 +52,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CONSISTENCY_TOKEN_HEADER, "ETag"],
 )
+app.add_middleware(ConsistencyTokenMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include routes
 app.include_router(router, prefix="/api")
@@ -28,3 +65,9 @@ app.include_router(router, prefix="/api")
 async def health():
     """Health check endpoint."""
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Request metrics in the Prometheus text format."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
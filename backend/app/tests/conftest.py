@@ -6,12 +6,20 @@ if "DATABASE_URL" not in os.environ:
     os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
 
 import asyncio
+import contextlib
+import functools
 import pytest
+import sqlite3
 import uuid
+from collections import defaultdict
+from typing import Dict, List, Tuple
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy import text
+from sqlalchemy import event, text
 
-from app.infrastructure.db import get_db
+from app.infrastructure.db import dispose_engine, get_db
+
+# Repositories bind uuid.UUID parameters; the test tables store ids as TEXT.
+sqlite3.register_adapter(uuid.UUID, str)
 
 
 @pytest.fixture(scope="session")
@@ -23,21 +31,43 @@ def event_loop():
 
 
 @pytest.fixture(scope="session")
-async def test_engine():
-    """Create test database engine."""
+def test_engine(event_loop):
+    """Create test database engine.
+
+    A plain fixture driving the session loop: as an async session fixture
+    its teardown ran on an already closed loop, the engine was never
+    disposed and the aiosqlite worker thread kept pytest from exiting.
+    """
     engine = create_async_engine(
         "sqlite+aiosqlite:///:memory:",
         echo=True,
     )
-    
-    # Create tables
+    event_loop.run_until_complete(_create_tables(engine))
+    yield engine
+    event_loop.run_until_complete(engine.dispose())
+
+
+@pytest.fixture(scope="session", autouse=True)
+def dispose_app_engine(event_loop):
+    """Dispose the engines the app created during the session.
+
+    ASGITransport does not run the app's lifespan, so the engine created
+    lazily by the first request is never disposed there; its aiosqlite
+    worker thread would keep pytest from exiting.
+    """
+    yield
+    event_loop.run_until_complete(dispose_engine())
+
+
+async def _create_tables(engine):
     async with engine.begin() as conn:
         await conn.execute(text("""
             CREATE TABLE IF NOT EXISTS users (
                 id TEXT PRIMARY KEY,
                 email TEXT UNIQUE NOT NULL,
                 name TEXT NOT NULL,
-                created_at TIMESTAMP NOT NULL
+                created_at TIMESTAMP NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1
             )
         """))
         await conn.execute(text("""
@@ -47,6 +77,7 @@ async def test_engine():
                 status TEXT NOT NULL,
                 total_amount REAL NOT NULL,
                 created_at TIMESTAMP NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1,
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
         """))
@@ -70,9 +101,6 @@ async def test_engine():
                 FOREIGN KEY (order_id) REFERENCES orders(id)
             )
         """))
-    
-    yield engine
-    await engine.dispose()
 
 
 @pytest.fixture(scope="session")
@@ -93,3 +121,59 @@ async def db_session(test_session_factory):
 def sample_user_id():
     """Create a sample user ID."""
     return uuid.uuid4()
+
+
+class QueryCounter:
+    """Records the SQL statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine.sync_engine
+        self.statements: List[Tuple[str, str]] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((" ".join(statement.split()), repr(parameters)))
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self) -> Dict[str, int]:
+        """Statements run with several different parameter sets: the N+1 signature."""
+        params = defaultdict(set)
+        for statement, parameters in self.statements:
+            params[statement].add(parameters)
+        return {statement: len(p) for statement, p in params.items() if len(p) > 1}
+
+
+@contextlib.contextmanager
+def _max_queries(default_engine, limit: int, strict: bool = False, engine=None):
+    with QueryCounter(engine or default_engine) as counter:
+        yield counter
+    if counter.count > limit:
+        listing = "\n".join(f"  {statement}" for statement, _ in counter.statements)
+        raise AssertionError(
+            f"Expected at most {limit} queries, got {counter.count}:\n{listing}"
+        )
+    repeated = counter.repeated()
+    if strict and repeated:
+        listing = "\n".join(f"  {n}x {statement}" for statement, n in repeated.items())
+        raise AssertionError(f"Same statement run with different parameters (N+1):\n{listing}")
+
+
+@pytest.fixture
+def max_queries(test_engine):
+    """Query budget for a block: `with max_queries(3): ...`.
+
+    Fails when the block runs more statements than the budget on the test
+    engine (or on `engine=`, e.g. the app's engine in integration tests);
+    with `strict=True` it also fails on a statement repeated with different
+    parameters.
+    """
+    return functools.partial(_max_queries, test_engine)
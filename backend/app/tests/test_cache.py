@@ -0,0 +1,208 @@
+"""Tests for the in-process repository caches."""
+
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.application.order_service import OrderService
+from app.domain.order import Order, OrderStatus
+from app.domain.user import User
+from app.infrastructure.cache import CachedOrderRepository, CachedUserRepository, TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _OrderRepo:
+    """OrderRepository stand-in that counts loads."""
+
+    def __init__(self, order, during_load=None):
+        self.order = order
+        self.loads = 0
+        self.remembered = []
+        self.during_load = during_load
+
+    async def find_by_id(self, order_id, include=None):
+        self.loads += 1
+        if self.during_load is not None:
+            self.during_load()
+        return self.order
+
+    async def save(self, order):
+        pass
+
+    def _remember(self, order):
+        self.remembered.append(order)
+        return order
+
+
+class _UserRepo:
+    """UserRepository stand-in that counts loads."""
+
+    def __init__(self, user):
+        self.user = user
+        self.loads = 0
+
+    async def find_by_id(self, user_id):
+        self.loads += 1
+        return self.user
+
+    async def save(self, user):
+        pass
+
+
+class TestTTLCache:
+
+    def test_expired_entries_miss(self):
+        clock = _Clock()
+        cache = TTLCache(max_entries=10, ttl=5, clock=clock)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        clock.now = 6
+        assert cache.get("a") is None
+        assert (cache.stats().hits, cache.stats().misses) == (1, 1)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_zero_size_disables_cache(self):
+        cache = TTLCache(max_entries=0, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+
+class TestCachedOrderRepository:
+
+    @pytest.mark.asyncio
+    async def test_hits_return_private_copies(self):
+        order = Order(user_id=uuid.uuid4())
+        order.add_item("Product", Decimal("10.00"), 1)
+        repo = _OrderRepo(order)
+        cached = CachedOrderRepository(repo, TTLCache(10, 60))
+
+        await cached.find_by_id(order.id)
+        copy = await cached.find_by_id(order.id)
+        copy.add_item("Other", Decimal("1.00"), 1)
+        again = await cached.find_by_id(order.id)
+
+        assert repo.loads == 1
+        assert len(again.items) == 1
+        assert repo.remembered == [copy, again]
+
+    @pytest.mark.asyncio
+    async def test_written_order_is_not_cached_until_transaction_ends(self):
+        order = Order(user_id=uuid.uuid4())
+        repo = _OrderRepo(order)
+        cached = CachedOrderRepository(repo, TTLCache(10, 60))
+
+        await cached.save(order)
+        await cached.find_by_id(order.id)
+        await cached.find_by_id(order.id)
+        assert repo.loads == 2
+
+        cached.end_transaction()
+        await cached.find_by_id(order.id)
+        await cached.find_by_id(order.id)
+        assert repo.loads == 3
+
+    @pytest.mark.asyncio
+    async def test_terminal_orders_use_long_ttl(self):
+        clock = _Clock()
+        order = Order(user_id=uuid.uuid4(), status=OrderStatus.COMPLETED)
+        repo = _OrderRepo(order)
+        cached = CachedOrderRepository(repo, TTLCache(10, 5, clock=clock), terminal_ttl=3600)
+
+        await cached.find_by_id(order.id)
+        clock.now = 60
+        await cached.find_by_id(order.id)
+        assert repo.loads == 1
+
+    @pytest.mark.asyncio
+    async def test_load_overlapping_an_invalidation_is_not_cached(self):
+        order = Order(user_id=uuid.uuid4())
+        cache = TTLCache(10, 60)
+        # A concurrent write commits while the row is being read.
+        repo = _OrderRepo(order, during_load=lambda: cache.invalidate(order.id))
+        cached = CachedOrderRepository(repo, cache)
+
+        await cached.find_by_id(order.id)
+        repo.during_load = None
+        await cached.find_by_id(order.id)
+        await cached.find_by_id(order.id)
+        assert repo.loads == 2
+
+    @pytest.mark.asyncio
+    async def test_bypassing_session_neither_reads_nor_fills(self):
+        order = Order(user_id=uuid.uuid4())
+        cache = TTLCache(10, 60)
+        cache.set(order.id, Order(user_id=order.user_id, id=order.id, version=1))
+        order.version = 2
+        repo = _OrderRepo(order)
+        cached = CachedOrderRepository(repo, cache, use_cache=False, fill_cache=False)
+
+        assert (await cached.find_by_id(order.id)).version == 2
+        assert repo.loads == 1
+        assert cache.get(order.id).version == 1
+
+    @pytest.mark.asyncio
+    async def test_replica_session_reads_but_does_not_fill(self):
+        order = Order(user_id=uuid.uuid4())
+        cache = TTLCache(10, 60)
+        repo = _OrderRepo(order)
+        cached = CachedOrderRepository(repo, cache, fill_cache=False)
+
+        await cached.find_by_id(order.id)
+        await cached.find_by_id(order.id)
+        assert repo.loads == 2
+
+        cache.set(order.id, order)
+        await cached.find_by_id(order.id)
+        assert repo.loads == 2
+
+
+class TestCachedUserRepository:
+
+    @pytest.mark.asyncio
+    async def test_create_order_finds_user_in_cache(self):
+        user = User(email="cached@example.com")
+        cache = TTLCache(10, 60)
+        cache.set(user.id, user)
+        users = _UserRepo(user)
+        # The write unit of work reads users from the cache but never fills it.
+        service = OrderService(
+            _OrderRepo(None),
+            CachedUserRepository(users, cache, fill_cache=False),
+        )
+
+        order = await service.create_order(user.id)
+
+        assert order.user_id == user.id
+        assert users.loads == 0
+
+    @pytest.mark.asyncio
+    async def test_user_written_in_this_transaction_is_loaded(self):
+        user = User(email="written@example.com")
+        cache = TTLCache(10, 60)
+        users = _UserRepo(user)
+        cached = CachedUserRepository(users, cache, fill_cache=False)
+
+        await cached.save(user)
+        cache.set(user.id, User(email="stale@example.com", id=user.id))
+
+        assert (await cached.find_by_id(user.id)).email == "written@example.com"
+        assert users.loads == 1
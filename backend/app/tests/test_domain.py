@@ -20,6 +20,7 @@ from app.domain.exceptions import (
     InvalidQuantityError,
     InvalidPriceError,
     InvalidAmountError,
+    InvalidStatusTransitionError,
 )
 
 
@@ -203,7 +204,7 @@ class TestOrderInvariants:
         """INVARIANT: Order must be paid before shipping."""
         order = Order(user_id=uuid.uuid4())
         
-        with pytest.raises(ValueError):
+        with pytest.raises(InvalidStatusTransitionError):
             order.ship()
 
     def test_complete_order_requires_shipped_status(self):
@@ -211,7 +212,7 @@ class TestOrderInvariants:
         order = Order(user_id=uuid.uuid4())
         order.pay()
         
-        with pytest.raises(ValueError):
+        with pytest.raises(InvalidStatusTransitionError):
             order.complete()
 
 
@@ -0,0 +1,38 @@
+"""Trusted construction of persisted domain objects."""
+
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.domain.money import Money
+from app.domain.order import Order, OrderItem, OrderStatus
+from app.domain.user import User
+
+
+class TestRestore:
+
+    def test_order_restore_keeps_stored_state(self):
+        order_id = uuid.uuid4()
+        item = OrderItem.restore(uuid.uuid4(), order_id, "Product", Money(250), 4)
+        order = Order.restore(
+            id=order_id,
+            user_id=uuid.uuid4(),
+            status=OrderStatus.PAID,
+            total_amount=Money(1000),
+            created_at=datetime.now(timezone.utc),
+            version=3,
+            items=[item],
+            status_history=[],
+        )
+        assert order.items[0].subtotal == order.total_amount
+        assert order.version == 3
+
+    def test_user_restore_skips_validation(self):
+        user = User.restore(uuid.uuid4(), "legacy-address", "", datetime.now(timezone.utc), 1)
+        assert user.email == "legacy-address"
+
+    def test_domain_objects_have_no_dict(self):
+        order = Order(user_id=uuid.uuid4())
+        order.add_item("Product", Decimal("1"), 1)
+        assert not hasattr(order, "__dict__")
+        assert not hasattr(order.items[0], "__dict__")
@@ -0,0 +1,38 @@
+"""Tests for ETag helpers."""
+
+import uuid
+
+from starlette.requests import Request
+
+from app.api.etag import entity_etag, etag_matches, page_etag, representation
+
+
+def _request(if_none_match: str) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(b"if-none-match", if_none_match.encode())],
+    })
+
+
+class TestETag:
+
+    def test_entity_etag_changes_with_version(self):
+        order_id = uuid.uuid4()
+        assert entity_etag("order", order_id, 1) != entity_etag("order", order_id, 2)
+
+    def test_page_etag_depends_on_next_page(self):
+        rows = [(uuid.uuid4(), 1)]
+        assert page_etag("orders", rows, False) != page_etag("orders", rows, True)
+
+    def test_if_none_match_list_and_weak_tags(self):
+        etag = entity_etag("user", uuid.uuid4(), 3)
+        assert etag_matches(_request(f'"other", W/{etag}'), etag)
+        assert etag_matches(_request("*"), etag)
+        assert not etag_matches(_request('"other"'), etag)
+
+    def test_sparse_representation_has_own_etag(self):
+        order_id = uuid.uuid4()
+        full = frozenset({"items", "history"})
+        assert representation(None, full, full) == ""
+        sparse = representation(frozenset({"id"}), full, full)
+        assert entity_etag("order", order_id, 1, sparse) != entity_etag("order", order_id, 1)
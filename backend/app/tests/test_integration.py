@@ -7,10 +7,33 @@ They require a running database.
 To run: pytest app/tests/test_integration.py -v
 """
 
+import uuid
+from decimal import Decimal
+
 import pytest
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
 
 from app.main import app
+from app.domain.exceptions import OrderVersionConflictError
+from app.domain.money import Money
+from app.domain.order import Order, OrderStatus, allowed_from
+from app.domain.queries import OrderFilter
+from app.domain.user import User
+from app.infrastructure.db import SessionLocal, get_engine
+from app.infrastructure.repositories import OrderRepository, UserRepository
+
+
+async def _saved_user(session) -> User:
+    user = User(email=f"{uuid.uuid4().hex[:12]}@example.com", name="Integration")
+    await UserRepository(session).save(user)
+    return user
+
+
+async def _stored_total(session, order_id) -> Decimal:
+    return await session.scalar(
+        text("SELECT total_amount FROM orders WHERE id = :id"), {"id": order_id}
+    )
 
 
 class TestHealthEndpoint:
@@ -116,3 +139,217 @@ class TestAPIEndpointsExist:
                 f"/api/orders/{order_id}/cancel"
             )
             assert response.status_code != 404
+
+
+class TestOrderRepositorySave:
+    """OrderRepository.save writes only changes, guarded by the order version."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_change_raises_version_conflict(self):
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            user_response = await client.post(
+                "/api/users",
+                json={"email": "versiontest@example.com", "name": "Version Test"}
+            )
+            order_response = await client.post(
+                "/api/orders",
+                json={"user_id": user_response.json()["id"]}
+            )
+        order_id = uuid.UUID(order_response.json()["id"])
+
+        get_engine()
+        async with SessionLocal() as first, SessionLocal() as second:
+            first_repo, second_repo = OrderRepository(first), OrderRepository(second)
+            first_order = await first_repo.find_by_id(order_id)
+            second_order = await second_repo.find_by_id(order_id)
+            await second.commit()
+
+            # Nothing changed: no statement is sent, the version stays.
+            await first_repo.save(first_order)
+            assert first_order.version == 1
+
+            first_order.pay()
+            await first_repo.save(first_order)
+            await first.commit()
+            assert first_order.version == 2
+
+            second_order.cancel()
+            with pytest.raises(OrderVersionConflictError):
+                await second_repo.save(second_order)
+
+
+class TestOrderEtag:
+    """Any change to an order, even one that keeps its total, changes its ETag."""
+
+    @pytest.mark.asyncio
+    async def test_zero_price_item_changes_etag(self):
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            user_response = await client.post(
+                "/api/users",
+                json={"email": "etagtest@example.com", "name": "ETag Test"}
+            )
+            order_response = await client.post(
+                "/api/orders",
+                json={"user_id": user_response.json()["id"]}
+            )
+            order_url = f"/api/orders/{order_response.json()['id']}"
+            etag = (await client.get(order_url)).headers["ETag"]
+
+            await client.post(
+                f"{order_url}/items",
+                json={"product_name": "Gift", "price": "0.00", "quantity": 1}
+            )
+            response = await client.get(order_url, headers={"If-None-Match": etag})
+
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+            assert [i["product_name"] for i in response.json()["items"]] == ["Gift"]
+
+
+class TestOrderTotalTriggers:
+    """orders.total_amount is kept by the statement-level order_items triggers."""
+
+    @pytest.mark.asyncio
+    async def test_total_follows_item_inserts_updates_and_deletes(self):
+        get_engine()
+        async with SessionLocal() as session:
+            user = await _saved_user(session)
+            order = Order(user_id=user.id)
+            order.add_items([
+                ("A", Money(1000), 2),
+                ("B", Money(250), 4),
+            ])
+            # New order row with a zero total, then one multi-row INSERT.
+            await OrderRepository(session).save(order)
+            await session.commit()
+            assert await _stored_total(session, order.id) == Decimal("30.00")
+
+            repo = OrderRepository(session)
+            order = await repo.find_by_id(order.id)
+            order.add_item("C", Money(100), 1)
+            await repo.save(order)
+            assert await _stored_total(session, order.id) == Decimal("31.00")
+
+            # One UPDATE ... FROM unnest() over both changed items.
+            first, second, _ = sorted(order.items, key=lambda i: i.product_name)
+            first.quantity = 1
+            second.price = Money(500)
+            await repo.save(order)
+            assert await _stored_total(session, order.id) == Decimal("31.00")
+
+            second.quantity = 1
+            await repo.save(order)
+            assert await _stored_total(session, order.id) == Decimal("16.00")
+
+            await session.execute(
+                text("DELETE FROM order_items WHERE id = :id"), {"id": first.id}
+            )
+            assert await _stored_total(session, order.id) == Decimal("6.00")
+
+            await session.execute(
+                text("DELETE FROM order_items WHERE order_id = :id"), {"id": order.id}
+            )
+            assert await _stored_total(session, order.id) == Decimal("0.00")
+            await session.commit()
+
+
+class TestOrderStatusColumn:
+    """Statuses round-trip through the order_status ENUM column."""
+
+    @pytest.mark.asyncio
+    async def test_order_moves_through_every_status(self):
+        get_engine()
+        async with SessionLocal() as session:
+            user = await _saved_user(session)
+            repo = OrderRepository(session)
+            order, other = Order(user_id=user.id), Order(user_id=user.id)
+            await repo.save(order)
+            await repo.save(other)
+            await session.commit()
+
+            # The history trigger stamps NOW(), fixed per transaction, so each
+            # step commits to keep the history order unambiguous.
+            assert (await repo.pay(order.id)).status == OrderStatus.PAID
+            await session.commit()
+
+            order = await repo.find_by_id(order.id)
+            order.ship()
+            await repo.save(order)
+            await session.commit()
+
+            [(_, before, moved)] = await repo.transition_many(
+                OrderStatus.COMPLETED,
+                allowed_from(OrderStatus.COMPLETED),
+                order_ids=[order.id],
+            )
+            assert (before, moved) == (OrderStatus.SHIPPED, True)
+            await session.commit()
+
+            # Filter mode compares with CAST(:allowed AS order_status[]):
+            # only `other` is still created.
+            moved = await repo.transition_many(
+                OrderStatus.CANCELLED,
+                allowed_from(OrderStatus.CANCELLED),
+                filter=OrderFilter(user_id=user.id),
+                limit=10,
+            )
+            assert moved == [(other.id, OrderStatus.CREATED, True)]
+            await session.commit()
+
+        async with SessionLocal() as session:
+            repo = OrderRepository(session)
+            order = await repo.find_by_id(order.id)
+            assert order.status == OrderStatus.COMPLETED
+            assert [c.status for c in order.status_history] == [
+                OrderStatus.CREATED,
+                OrderStatus.PAID,
+                OrderStatus.SHIPPED,
+                OrderStatus.COMPLETED,
+            ]
+
+            page = await repo.find_page(OrderFilter(user_id=user.id), limit=10)
+            assert {o.id: o.status for o in page.items} == {
+                order.id: OrderStatus.COMPLETED,
+                other.id: OrderStatus.CANCELLED,
+            }
+            page = await repo.find_page(
+                OrderFilter(user_id=user.id, status=OrderStatus.CANCELLED), limit=10
+            )
+            assert [o.id for o in page.items] == [other.id]
+
+
+class TestQueryBudgets:
+    """Order reads must not issue a query per order (N+1)."""
+
+    @pytest.mark.asyncio
+    async def test_list_orders_query_budget(self, max_queries):
+        """GET /api/orders runs a fixed number of queries for a page."""
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            user_response = await client.post(
+                "/api/users",
+                json={"email": "budgettest@example.com", "name": "Budget Test"}
+            )
+            user_id = user_response.json()["id"]
+            for _ in range(3):
+                order_response = await client.post("/api/orders", json={"user_id": user_id})
+                await client.post(
+                    f"/api/orders/{order_response.json()['id']}/items",
+                    json={"product_name": "Product", "price": "10.00", "quantity": 1}
+                )
+
+            with max_queries(5, strict=True, engine=get_engine()):
+                response = await client.get(
+                    "/api/orders",
+                    params={"user_id": user_id, "include": "items,history"}
+                )
+            assert response.status_code == 200
+            assert len(response.json()["items"]) == 3
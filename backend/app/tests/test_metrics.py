@@ -0,0 +1,52 @@
+"""Tests for per-request metrics and their Prometheus rendering."""
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.middleware import MetricsMiddleware
+from app.infrastructure import metrics
+
+
+class TestMetrics:
+
+    @pytest.mark.asyncio
+    async def test_db_statements_are_attributed_to_route(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        metrics.instrument_engine(engine)
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/things/{thing_id}")
+        async def get_thing(thing_id: int):
+            async with engine.connect() as conn:
+                for _ in range(3):
+                    await conn.execute(text("SELECT 1 UNION ALL SELECT 2"))
+            return {"id": thing_id}
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            await client.get("/things/1")
+            await client.get("/things/2")
+        await engine.dispose()
+
+        labels = ("GET", "/things/{thing_id}")
+        _, queries, requests = metrics.REQUEST_QUERIES._series[labels]
+        assert (queries, requests) == (6, 2)
+        assert metrics.REQUESTS._values[("GET", "/things/{thing_id}", "200")] == 2
+
+        rendered = metrics.render()
+        assert '# TYPE http_request_duration_seconds histogram' in rendered
+        assert 'http_request_db_queries_bucket{method="GET",route="/things/{thing_id}",le="5"} 2' in rendered
+        assert 'http_request_db_result_rows_count{method="GET",route="/things/{thing_id}"} 2' in rendered
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram("h", "Test.", ("route",), (1, 10))
+        for value in (0.5, 5, 50):
+            histogram.observe(("/r",), value)
+        assert histogram.render()[2:5] == [
+            'h_bucket{route="/r",le="1"} 1',
+            'h_bucket{route="/r",le="10"} 2',
+            'h_bucket{route="/r",le="+Inf"} 3',
+        ]
@@ -0,0 +1,30 @@
+"""Tests for migration discovery and statement splitting."""
+
+from app.infrastructure.migrations import (
+    MIGRATIONS_DIR,
+    Migration,
+    discover,
+    implicit_baseline,
+)
+
+
+class TestMigrations:
+
+    def test_discover_orders_by_version(self):
+        versions = [m.version for m in discover(MIGRATIONS_DIR)]
+        assert versions == sorted(versions)
+        assert versions[:3] == [1, 2, 3]
+
+    def test_index_migration_runs_outside_transaction(self):
+        indexes = next(m for m in discover(MIGRATIONS_DIR) if m.version == 3)
+        assert not indexes.transactional
+        assert all("CONCURRENTLY" in s for s in indexes.statements())
+
+    def test_statements_skip_comments(self):
+        migration = Migration(9, "009_x.sql", "-- migrate: no-transaction\n-- a; b\nSELECT 1;\nSELECT 2;\n")
+        assert migration.statements() == ["SELECT 1", "SELECT 2"]
+
+    def test_pre_ledger_schema_is_baselined_at_001(self):
+        assert implicit_baseline(set(), has_schema=True) == 1
+        assert implicit_baseline(set(), has_schema=False) is None
+        assert implicit_baseline({1, 2}, has_schema=True) is None
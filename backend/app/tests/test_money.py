@@ -0,0 +1,31 @@
+"""Money keeps amounts as integer cents."""
+
+import uuid
+from decimal import Decimal
+
+from app.domain.money import Money
+from app.domain.order import Order
+
+
+class TestMoney:
+
+    def test_converts_from_db_and_json_values(self):
+        assert Money.of(Decimal("19.99")).cents == 1999
+        assert Money.of(19.99).cents == 1999
+        assert Money.of(Decimal("0.005")).cents == 1
+
+    def test_compares_with_decimal(self):
+        assert Money(1999) == Decimal("19.99")
+        assert hash(Money(1000)) == hash(Decimal("10.00"))
+        assert Money(-1) < 0
+
+    def test_renders_decimal_format(self):
+        assert str(Money(1999)) == "19.99"
+        assert str(Money(-5)) == "-0.05"
+        assert Money(0).to_decimal() == Decimal("0.00")
+
+    def test_order_total_is_integer_arithmetic(self):
+        order = Order(user_id=uuid.uuid4())
+        order.add_items([("A", Decimal("0.10"), 3), ("B", Decimal("0.20"), 1)])
+        assert order.total_amount == Money(50)
+        assert isinstance(order.total_amount, Money)
@@ -0,0 +1,68 @@
+"""Tests for adding several items to an order at once."""
+
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.domain.order import Order, OrderStatus
+from app.domain.exceptions import (
+    InvalidQuantityError,
+    OrderCancelledError,
+    OrderCompletedError,
+)
+
+
+class TestAddItems:
+    """Order.add_items must be all-or-nothing."""
+
+    def test_add_items_appends_all_and_updates_total(self):
+        order = Order(user_id=uuid.uuid4())
+        items = order.add_items([
+            ("Product 1", Decimal("100.00"), 1),
+            ("Product 2", Decimal("25.00"), 2),
+        ])
+
+        assert [i.product_name for i in items] == ["Product 1", "Product 2"]
+        assert order.items == items
+        assert all(i.order_id == order.id for i in items)
+        assert order.total_amount == Decimal("150.00")
+
+    def test_invalid_item_leaves_order_unchanged(self):
+        order = Order(user_id=uuid.uuid4())
+        order.add_item("Existing", Decimal("10.00"), 1)
+
+        with pytest.raises(InvalidQuantityError):
+            order.add_items([
+                ("Valid", Decimal("5.00"), 1),
+                ("Invalid", Decimal("5.00"), 0),
+            ])
+
+        assert len(order.items) == 1
+        assert order.total_amount == Decimal("10.00")
+
+    def test_cannot_add_items_to_cancelled_order(self):
+        order = Order(user_id=uuid.uuid4())
+        order.cancel()
+
+        with pytest.raises(OrderCancelledError):
+            order.add_items([("Product", Decimal("1.00"), 1)])
+
+
+class TestTerminalOrderItems:
+    """Items of a completed order are fixed, like those of a cancelled one."""
+
+    def test_cannot_add_item_to_completed_order(self):
+        order = Order(user_id=uuid.uuid4(), status=OrderStatus.SHIPPED)
+        order.complete()
+
+        with pytest.raises(OrderCompletedError):
+            order.add_item("Product", Decimal("1.00"), 1)
+        assert order.items == []
+
+    def test_cannot_add_items_to_completed_order(self):
+        order = Order(user_id=uuid.uuid4(), status=OrderStatus.COMPLETED)
+
+        with pytest.raises(OrderCompletedError):
+            order.add_items([("Product", Decimal("1.00"), 1)])
+        assert order.total_amount == Decimal("0.00")
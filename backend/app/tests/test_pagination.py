@@ -0,0 +1,25 @@
+"""Tests for keyset pagination cursors."""
+
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.api.pagination import encode_cursor, decode_cursor
+
+
+class TestPageCursor:
+    """Cursors must round-trip the (created_at, id) page key."""
+
+    def test_cursor_round_trip(self):
+        key = (datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc), uuid.uuid4())
+        assert decode_cursor(encode_cursor(key)) == key
+
+    def test_no_key_means_no_cursor(self):
+        assert encode_cursor(None) is None
+        assert decode_cursor(None) is None
+        assert decode_cursor("") is None
+
+    def test_malformed_cursor_raises_value_error(self):
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
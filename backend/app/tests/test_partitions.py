@@ -0,0 +1,57 @@
+"""Tests for order_status_history partition bookkeeping."""
+
+import asyncio
+from datetime import date
+
+import pytest
+
+from app.infrastructure.partitions import (
+    _partition_end,
+    maintain_history_partitions,
+    retention_cutoff,
+)
+
+
+class _Engine:
+    """AsyncEngine stand-in whose first transaction fails."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def begin(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("database unavailable")
+
+
+class TestPartitions:
+
+    def test_partition_end_is_first_day_of_next_month(self):
+        assert _partition_end("order_status_history_y2024m03") == date(2024, 4, 1)
+        assert _partition_end("order_status_history_y2024m12") == date(2025, 1, 1)
+
+    def test_default_partition_is_never_archived(self):
+        assert _partition_end("order_status_history_default") is None
+
+    def test_retention_cutoff(self):
+        assert retention_cutoff(12, date(2025, 3, 15)) == date(2024, 3, 1)
+        assert retention_cutoff(3, date(2025, 2, 1)) == date(2024, 11, 1)
+
+    @pytest.mark.asyncio
+    async def test_maintenance_keeps_running_after_a_failure(self):
+        engine = _Engine()
+        task = asyncio.create_task(maintain_history_partitions(engine, interval=0))
+        while engine.calls < 3:
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
@@ -0,0 +1,86 @@
+"""Tests for the max_queries fixture and repository query budgets."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.domain.user import User
+from app.infrastructure.cache import CachedUserRepository, TTLCache
+from app.infrastructure.repositories import UserRepository
+
+
+class TestQueryBudget:
+
+    @pytest.mark.asyncio
+    async def test_counts_statements_within_budget(self, test_engine, max_queries):
+        async with test_engine.connect() as conn:
+            with max_queries(2) as counter:
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+        assert counter.count == 2
+
+    @pytest.mark.asyncio
+    async def test_fails_over_budget(self, test_engine, max_queries):
+        async with test_engine.connect() as conn:
+            with pytest.raises(AssertionError, match="at most 1 queries, got 2"):
+                with max_queries(1):
+                    await conn.execute(text("SELECT 1"))
+                    await conn.execute(text("SELECT 2"))
+
+    @pytest.mark.asyncio
+    async def test_strict_mode_flags_n_plus_one(self, test_engine, max_queries):
+        async with test_engine.connect() as conn:
+            with pytest.raises(AssertionError, match="N\\+1"):
+                with max_queries(10, strict=True):
+                    for order_id in ("a", "b", "c"):
+                        await conn.execute(
+                            text("SELECT * FROM order_items WHERE order_id = :order_id"),
+                            {"order_id": order_id},
+                        )
+
+    @pytest.mark.asyncio
+    async def test_strict_mode_allows_batched_query(self, test_engine, max_queries):
+        async with test_engine.connect() as conn:
+            with max_queries(1, strict=True):
+                await conn.execute(
+                    text("SELECT * FROM order_items WHERE order_id IN ('a', 'b', 'c')")
+                )
+
+
+async def _save_users(repo, count):
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    users = [
+        User(email=f"budget{n}@example.com", name=f"User {n}", created_at=created_at + timedelta(minutes=n))
+        for n in range(count)
+    ]
+    for user in users:
+        await repo.save(user)
+    return users
+
+
+class TestRepositoryQueryBudgets:
+
+    @pytest.mark.asyncio
+    async def test_user_page_is_one_query(self, db_session, max_queries):
+        repo = UserRepository(db_session)
+        users = await _save_users(repo, 5)
+
+        with max_queries(1, strict=True):
+            page = await repo.find_page(limit=3)
+
+        assert [u.email for u in page.items] == [u.email for u in users[:3]]
+        assert page.next_key is not None
+
+    @pytest.mark.asyncio
+    async def test_cached_user_hit_runs_no_query(self, db_session, max_queries):
+        repo = CachedUserRepository(UserRepository(db_session), TTLCache(10, 60))
+        [user] = await _save_users(repo, 1)
+        repo.end_transaction()
+
+        with max_queries(1):
+            await repo.find_by_id(user.id)
+        with max_queries(0):
+            cached = await repo.find_by_id(user.id)
+
+        assert cached.email == user.email
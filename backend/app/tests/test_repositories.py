@@ -0,0 +1,220 @@
+"""Tests for the SQL repositories against a recording session stand-in."""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.domain.exceptions import OrderVersionConflictError
+from app.domain.money import Money
+from app.domain.order import Order, OrderStatus
+from app.domain.queries import OrderFilter
+from app.infrastructure.repositories import OrderRepository
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return list(self.rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def scalar_one_or_none(self):
+        return next(iter(self.rows[0].values())) if self.rows else None
+
+    def scalar_one(self):
+        return next(iter(self.rows[0].values()))
+
+
+class _Session:
+    """AsyncSession stand-in: records statements and answers with queued rows."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(" ".join(str(statement).split()))
+        return _Result(self.results.pop(0) if self.results else [])
+
+
+_CREATED_AT = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _order_row(order_id, **values):
+    return {
+        "id": order_id,
+        "user_id": uuid.uuid4(),
+        "status": "created",
+        "created_at": _CREATED_AT,
+        "version": 1,
+        "total_cents": 0,
+        **values,
+    }
+
+
+def _item_row(order_id, price_cents=1000, quantity=1):
+    return {
+        "id": uuid.uuid4(),
+        "order_id": order_id,
+        "product_name": "Product",
+        "price_cents": price_cents,
+        "quantity": quantity,
+    }
+
+
+def _history_row(order_id, status, minutes):
+    return {
+        "id": uuid.uuid4(),
+        "order_id": order_id,
+        "status": status,
+        "changed_at": _CREATED_AT + timedelta(minutes=minutes),
+    }
+
+
+class TestLoadOrders:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("count", [1, 20])
+    async def test_query_count_does_not_depend_on_order_count(self, count):
+        ids = [uuid.uuid4() for _ in range(count)]
+        session = _Session(
+            [_order_row(order_id) for order_id in ids],
+            [_item_row(order_id) for order_id in ids],
+            [_history_row(order_id, "paid", 1) for order_id in ids],
+        )
+
+        orders = await OrderRepository(session).find_all()
+
+        assert len(session.statements) == 3
+        assert [o.id for o in orders] == ids
+        assert all(len(o.items) == 1 and len(o.status_history) == 1 for o in orders)
+
+    @pytest.mark.asyncio
+    async def test_history_is_ordered_by_change_time(self):
+        order_id = uuid.uuid4()
+        session = _Session(
+            [_order_row(order_id)],
+            [],
+            [_history_row(order_id, "paid", 1), _history_row(order_id, "shipped", 2)],
+        )
+
+        [order] = await OrderRepository(session).find_all()
+
+        assert session.statements[2].endswith("ORDER BY changed_at")
+        assert [c.status.value for c in order.status_history] == ["paid", "shipped"]
+
+
+async def _loaded_order(session, **values):
+    """Load an order with one item through find_by_id so it is snapshotted."""
+    order_id = uuid.uuid4()
+    session.results.append([_order_row(
+        order_id,
+        total_cents=1000,
+        items=[_item_row(order_id)],
+        history=[],
+        **values,
+    )])
+    repo = OrderRepository(session)
+    order = await repo.find_by_id(order_id)
+    session.statements.clear()
+    return repo, order
+
+
+class TestSaveDirtyTracking:
+
+    @pytest.mark.asyncio
+    async def test_unchanged_order_is_not_written(self):
+        session = _Session()
+        repo, order = await _loaded_order(session)
+
+        await repo.save(order)
+
+        assert session.statements == []
+
+    @pytest.mark.asyncio
+    async def test_new_order_is_inserted_with_its_items(self):
+        session = _Session([{"version": 1}])
+        order = Order(user_id=uuid.uuid4())
+        order.add_item("Product", Money(1000), 2)
+        repo = OrderRepository(session)
+
+        await repo.save(order)
+        await repo.save(order)
+
+        assert len(session.statements) == 2
+        assert session.statements[0].startswith("INSERT INTO orders")
+        assert session.statements[1].startswith("INSERT INTO order_items")
+
+    @pytest.mark.asyncio
+    async def test_changed_status_is_updated_with_version_check(self):
+        session = _Session()
+        repo, order = await _loaded_order(session, version=3)
+        order.pay()
+        session.results.append([{"version": 4}])
+
+        await repo.save(order)
+
+        [update] = session.statements
+        assert update.startswith("UPDATE orders")
+        assert "version = :version" in update
+        assert order.version == 4
+
+    @pytest.mark.asyncio
+    async def test_stale_version_raises_conflict(self):
+        session = _Session()
+        repo, order = await _loaded_order(session)
+        order.cancel()
+        session.results.append([])
+
+        with pytest.raises(OrderVersionConflictError):
+            await repo.save(order)
+
+    @pytest.mark.asyncio
+    async def test_new_item_bumps_version_even_without_total_change(self):
+        session = _Session()
+        repo, order = await _loaded_order(session)
+        order.add_item("Gift", Money(0), 1)
+        session.results.append([{"version": 2}])
+
+        await repo.save(order)
+
+        bump, insert = session.statements
+        assert bump.startswith("UPDATE orders SET version = version + 1")
+        assert "status" not in bump
+        assert insert.startswith("INSERT INTO order_items")
+        assert order.version == 2
+
+    @pytest.mark.asyncio
+    async def test_item_change_on_stale_order_raises_conflict(self):
+        session = _Session()
+        repo, order = await _loaded_order(session)
+        order.items[0].quantity = 5
+        session.results.append([])
+
+        with pytest.raises(OrderVersionConflictError):
+            await repo.save(order)
+        assert len(session.statements) == 1
+
+
+class TestTransitionMany:
+
+    @pytest.mark.asyncio
+    async def test_filter_selects_only_eligible_orders_up_to_limit(self):
+        session = _Session([])
+
+        await OrderRepository(session).transition_many(
+            OrderStatus.SHIPPED,
+            frozenset({OrderStatus.PAID}),
+            filter=OrderFilter(user_id=uuid.uuid4()),
+            limit=100,
+        )
+
+        [statement] = session.statements
+        assert "status = ANY(CAST(:allowed AS order_status[])) ORDER BY created_at, id LIMIT :limit" in statement
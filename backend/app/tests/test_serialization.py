@@ -0,0 +1,42 @@
+"""The fast serialization path must render exactly like the response models."""
+
+import uuid
+from decimal import Decimal
+
+from pydantic_core import to_json
+
+from app.api.schemas import OrderDetailResponse, OrderPage, UserPage
+from app.api.serialization import order_detail_response, order_page, order_response, user_page
+from app.domain.order import Order
+from app.domain.user import User
+
+
+def _order() -> Order:
+    order = Order(user_id=uuid.uuid4())
+    order.add_item("Product", Decimal("19.99"), 3)
+    order.pay()
+    return order
+
+
+class TestSerialization:
+
+    def test_order_detail_matches_model(self):
+        data = order_detail_response(_order())
+        assert to_json(data) == OrderDetailResponse.model_validate(data).model_dump_json().encode()
+
+    def test_order_page_matches_model(self):
+        data = order_page([_order(), _order()], "cursor")
+        assert to_json(data) == OrderPage.model_validate(data).model_dump_json().encode()
+
+    def test_user_page_matches_model(self):
+        data = user_page([User(email="a@example.com", name="A")], None)
+        assert to_json(data) == UserPage.model_validate(data).model_dump_json().encode()
+
+    def test_sparse_order_leaves_out_unrequested_fields(self):
+        data = order_response(_order(), frozenset({"id", "status"}), frozenset())
+        assert set(data) == {"id", "status"}
+
+    def test_order_includes_only_requested_collections(self):
+        data = order_detail_response(_order(), include=frozenset({"history"}))
+        assert "items" not in data
+        assert [h["status"] for h in data["status_history"]] == ["paid"]
@@ -0,0 +1,104 @@
+"""Tests for the order status transition table and bulk transitions."""
+
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.routes import get_order_service
+from app.api.schemas import BulkStatusChange
+from app.application.order_service import OrderService
+from app.domain.exceptions import InvalidStatusTransitionError
+from app.domain.order import Order, OrderStatus, allowed_from
+from app.main import app
+
+
+class _OrderRepo:
+    """Applies the table to in-memory statuses like the set-based UPDATE."""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+
+    async def transition_many(self, target, allowed, order_ids=None, filter=None, limit=None):
+        rows = []
+        for order_id in order_ids:
+            current = self.statuses.get(order_id)
+            moved = current in allowed
+            if moved:
+                self.statuses[order_id] = target
+            rows.append((order_id, current, moved))
+        return rows
+
+
+class _LoadingRepo:
+    """Returns one order from find_by_id; nothing is saved."""
+
+    def __init__(self, order):
+        self.order = order
+
+    async def find_by_id(self, order_id, include=None):
+        return self.order
+
+    async def save(self, order):
+        pass
+
+
+class TestTransitions:
+
+    def test_bulk_filter_needs_a_criterion(self):
+        with pytest.raises(ValueError, match="at least one criterion"):
+            BulkStatusChange(status=OrderStatus.SHIPPED, filter={})
+        BulkStatusChange(status=OrderStatus.SHIPPED, filter={"status": "paid"})
+
+    def test_table_drives_order_methods(self):
+        order = Order(user_id=uuid.uuid4())
+        assert order.status in allowed_from(OrderStatus.PAID)
+        order.pay()
+        order.ship()
+        order.complete()
+        assert [c.status for c in order.status_history] == [
+            OrderStatus.PAID, OrderStatus.SHIPPED, OrderStatus.COMPLETED,
+        ]
+
+    def test_disallowed_transition_is_domain_error(self):
+        order = Order(user_id=uuid.uuid4())
+        with pytest.raises(InvalidStatusTransitionError):
+            order.ship()
+
+    @pytest.mark.asyncio
+    async def test_bulk_transition_reports_per_order_failures(self):
+        paid, created, missing = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        repo = _OrderRepo({paid: OrderStatus.PAID, created: OrderStatus.CREATED})
+        service = OrderService(repo, None)
+
+        results = await service.transition_orders(
+            OrderStatus.SHIPPED, [paid, created, missing, paid]
+        )
+
+        assert [(r.order_id, r.moved) for r in results] == [
+            (paid, True), (created, False), (missing, False),
+        ]
+        assert results[0].status == OrderStatus.SHIPPED
+        assert results[1].status == OrderStatus.CREATED
+        assert "not found" in results[2].error.lower()
+
+    @pytest.mark.asyncio
+    async def test_no_transitions_into_created(self):
+        with pytest.raises(ValueError):
+            await OrderService(_OrderRepo({}), None).transition_orders(
+                OrderStatus.CREATED, [uuid.uuid4()]
+            )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("action", ["ship", "complete"])
+    async def test_disallowed_transition_is_409(self, action):
+        order = Order(user_id=uuid.uuid4())
+        app.dependency_overrides[get_order_service] = lambda: OrderService(_LoadingRepo(order), None)
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post(f"/api/orders/{order.id}/{action}")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 409
+        assert "cannot move from created" in response.json()["detail"]
@@ -0,0 +1,197 @@
+"""Tests for the request-scoped unit of work dependencies."""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app.infrastructure import unit_of_work
+from app.infrastructure.settings import DatabaseSettings
+from app.infrastructure.unit_of_work import (
+    CONSISTENCY_TOKEN_HEADER,
+    UnitOfWork,
+    get_read_uow,
+    get_uow,
+)
+
+
+class _Session:
+    """AsyncSession stand-in that counts how the transaction ended."""
+
+    def __init__(self, name="primary"):
+        self.name = name
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    """Sessions opened by get_uow, without a database behind them."""
+    opened = []
+
+    def session_factory():
+        opened.append(_Session())
+        return opened[-1]
+
+    monkeypatch.setattr(unit_of_work, "init_engine", lambda: None)
+    monkeypatch.setattr(unit_of_work, "has_read_replica", lambda: False)
+    monkeypatch.setattr(unit_of_work, "SessionLocal", session_factory)
+    return opened
+
+
+async def _current_wal_lsn(session):
+    return "0/16B3748"
+
+
+async def _write_uow() -> UnitOfWork:
+    dependency = get_uow(SimpleNamespace(state=SimpleNamespace()))
+    uow = await dependency.__anext__()
+    await dependency.aclose()
+    return uow
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/ok")
+    async def ok(uow: UnitOfWork = Depends(get_uow)):
+        return {"ok": True}
+
+    @app.post("/fail")
+    async def fail(uow: UnitOfWork = Depends(get_uow)):
+        raise HTTPException(status_code=409, detail="conflict")
+
+    return app
+
+
+class TestGetUow:
+
+    @pytest.mark.asyncio
+    async def test_request_commits_exactly_once(self, sessions):
+        async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+            response = await client.post("/ok")
+
+        assert response.status_code == 200
+        [session] = sessions
+        assert (session.commits, session.rollbacks) == (1, 0)
+
+    @pytest.mark.asyncio
+    async def test_writes_bypass_the_order_cache_and_only_read_users(self, sessions):
+        uow = await _write_uow()
+
+        assert not uow.orders.use_cache and not uow.orders.fill_cache
+        assert uow.users.use_cache and not uow.users.fill_cache
+
+    @pytest.mark.asyncio
+    async def test_writes_with_replica_bypass_the_caches(self, sessions, monkeypatch):
+        monkeypatch.setattr(unit_of_work, "has_read_replica", lambda: True)
+        monkeypatch.setattr(unit_of_work, "current_wal_lsn", _current_wal_lsn)
+        uow = await _write_uow()
+
+        assert not uow.users.use_cache and not uow.orders.use_cache
+
+    @pytest.mark.asyncio
+    async def test_route_error_rolls_back(self, sessions):
+        async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+            response = await client.post("/fail")
+
+        assert response.status_code == 409
+        [session] = sessions
+        assert (session.commits, session.rollbacks) == (0, 1)
+
+
+@pytest.fixture
+def read_routing(monkeypatch):
+    """Routes get_read_uow to named stand-in sessions; the replica lag is settable."""
+    state = SimpleNamespace(replica=True, replayed=True, checks=0)
+
+    async def replica_has_replayed(session, lsn):
+        state.checks += 1
+        return state.replayed
+
+    monkeypatch.setattr(unit_of_work, "init_engine", lambda: None)
+    monkeypatch.setattr(unit_of_work, "has_read_replica", lambda: state.replica)
+    monkeypatch.setattr(unit_of_work, "replica_has_replayed", replica_has_replayed)
+    monkeypatch.setattr(
+        unit_of_work, "get_settings", lambda: DatabaseSettings(replica_wait_timeout=0.05)
+    )
+    monkeypatch.setattr(unit_of_work, "ReplicaSessionLocal", lambda: _Session("replica"))
+    monkeypatch.setattr(unit_of_work, "ReadSessionLocal", lambda: _Session("primary"))
+    return state
+
+
+async def _read_uow(token=None) -> UnitOfWork:
+    headers = {CONSISTENCY_TOKEN_HEADER: token} if token else {}
+    dependency = get_read_uow(SimpleNamespace(headers=headers))
+    uow = await dependency.__anext__()
+    await dependency.aclose()
+    return uow
+
+
+async def _read_session(token=None) -> str:
+    return (await _read_uow(token)).session.name
+
+
+class TestGetReadUow:
+
+    @pytest.mark.asyncio
+    async def test_reads_without_token_go_to_replica(self, read_routing):
+        assert await _read_session() == "replica"
+        assert read_routing.checks == 0
+
+    @pytest.mark.asyncio
+    async def test_malformed_token_is_ignored(self, read_routing):
+        assert await _read_session("not-an-lsn") == "replica"
+        assert read_routing.checks == 0
+
+    @pytest.mark.asyncio
+    async def test_token_without_replica_is_not_checked(self, read_routing):
+        read_routing.replica = False
+        assert await _read_session("0/16B3748") == "replica"
+        assert read_routing.checks == 0
+
+    @pytest.mark.asyncio
+    async def test_caught_up_replica_serves_token_reads(self, read_routing):
+        assert await _read_session("0/16B3748") == "replica"
+        assert read_routing.checks == 1
+
+    @pytest.mark.asyncio
+    async def test_lagging_replica_falls_back_to_primary_after_wait(self, read_routing):
+        read_routing.replayed = False
+        assert await _read_session("0/16B3748") == "primary"
+        assert read_routing.checks > 1
+
+
+class TestReadCachePolicy:
+
+    @pytest.mark.asyncio
+    async def test_primary_reads_fill_the_cache(self, read_routing):
+        read_routing.replica = False
+        uow = await _read_uow()
+        assert uow.orders.use_cache and uow.orders.fill_cache
+
+    @pytest.mark.asyncio
+    async def test_replica_turns_the_caches_off(self, read_routing):
+        uow = await _read_uow()
+        assert not uow.orders.use_cache and not uow.orders.fill_cache
+        assert not uow.users.use_cache and not uow.users.fill_cache
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("replica, replayed", [(True, True), (True, False), (False, True)])
+    async def test_token_reads_bypass_the_cache(self, read_routing, replica, replayed):
+        read_routing.replica, read_routing.replayed = replica, replayed
+        uow = await _read_uow("0/16B3748")
+        assert not uow.users.use_cache and not uow.users.fill_cache
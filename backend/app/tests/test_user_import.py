@@ -0,0 +1,78 @@
+"""Tests for the bulk user import parsers and service."""
+
+import pytest
+
+from app.api.imports import iter_lines, parse_user_csv, parse_user_ndjson
+from app.application.user_service import UserService
+from app.domain.user import ImportStatus
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def _collect(agen):
+    return [x async for x in agen]
+
+
+class _EmailSetRepo:
+    """Repository stand-in that treats known emails as already taken."""
+
+    def __init__(self, taken):
+        self.taken = set(taken)
+        self.calls = 0
+
+    async def insert_many(self, users):
+        self.calls += 1
+        inserted = set()
+        for user in users:
+            if user.email not in self.taken:
+                self.taken.add(user.email)
+                inserted.add(user.id)
+        return inserted
+
+
+class TestImportParsers:
+
+    @pytest.mark.asyncio
+    async def test_lines_split_across_chunks(self):
+        lines = await _collect(iter_lines(_chunks(b"a\r\nb", "é".encode()[:1], "é".encode()[1:] + b"\nc")))
+        assert lines == ["a", "bé", "c"]
+
+    @pytest.mark.asyncio
+    async def test_csv(self):
+        body = b"name,email\nAlice,a@example.com\n\nBob,b@example.com\n"
+        rows = await _collect(parse_user_csv(iter_lines(_chunks(body))))
+        assert rows == [("a@example.com", "Alice"), ("b@example.com", "Bob")]
+
+    @pytest.mark.asyncio
+    async def test_ndjson_rejects_malformed_line(self):
+        body = b'{"email": "a@example.com"}\nnot json\n'
+        with pytest.raises(ValueError, match="Line 2"):
+            await _collect(parse_user_ndjson(iter_lines(_chunks(body))))
+
+
+class TestImportUsers:
+
+    @pytest.mark.asyncio
+    async def test_report_marks_inserted_duplicate_and_invalid(self):
+        repo = _EmailSetRepo(taken={"old@example.com"})
+        records = _chunks(
+            ("new@example.com", "New"),
+            ("bad-email", ""),
+            ("old@example.com", "Old"),
+            ("new@example.com", "Again"),
+        )
+
+        report = await UserService(repo).import_users(records, batch_size=2)
+
+        assert [r.status for r in report] == [
+            ImportStatus.INSERTED,
+            ImportStatus.INVALID,
+            ImportStatus.DUPLICATE,
+            ImportStatus.DUPLICATE,
+        ]
+        assert [r.row for r in report] == [1, 2, 3, 4]
+        assert report[0].user_id is not None
+        assert repo.calls == 2
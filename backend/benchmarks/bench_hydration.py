@@ -0,0 +1,97 @@
+"""Benchmark: hydrating order items from rows, plain vs slotted dataclasses.
+
+Run from backend/:  python -m benchmarks.bench_hydration [items]
+
+The "dataclass" path reproduces the domain model before __slots__: every
+instance has a __dict__, each OrderItem is built through __init__, so
+__post_init__ validates it again, and the NUMERIC price is copied into a
+new Decimal. The "slots" path is what the repository does now:
+OrderItem.restore on the slotted class with the price read as integer
+cents. Neither includes asyncpg's own NUMERIC decoding, which the cents
+column also avoids.
+"""
+
+import sys
+import timeit
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Optional
+
+from app.domain.order import OrderItem
+from app.infrastructure.repositories import _item_from_row
+
+
+@dataclass
+class LegacyOrderItem:
+    product_name: str
+    order_id: Optional[uuid.UUID] = None
+    price: Decimal = Decimal()
+    quantity: int = 0
+    id: uuid.UUID = field(default_factory=uuid.uuid4)
+
+    def __post_init__(self):
+        if self.quantity <= 0:
+            raise ValueError(self.quantity)
+        if self.price < 0:
+            raise ValueError(self.price)
+
+
+def legacy_item_from_row(row) -> LegacyOrderItem:
+    return LegacyOrderItem(
+        product_name=row['product_name'],
+        price=Decimal(str(row['price'])),
+        quantity=row['quantity'],
+        id=row['id'],
+        order_id=row['order_id'],
+    )
+
+
+def make_rows(count: int):
+    """order_items rows with both the NUMERIC price and its value in cents."""
+    order_id = uuid.uuid4()
+    return [
+        {
+            "id": uuid.uuid4(),
+            "order_id": order_id,
+            "product_name": f"Product {n}",
+            "price": Decimal("19.99"),
+            "price_cents": 1999,
+            "quantity": n % 10 + 1,
+        }
+        for n in range(count)
+    ]
+
+
+def hydrate(rows, from_row):
+    return [from_row(row) for row in rows]
+
+
+def retained_bytes(rows, from_row) -> int:
+    """Memory held by the hydrated objects (row values are shared, not counted)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = hydrate(rows, from_row)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del items
+    return size
+
+
+def main(count: int = 100_000, repeat: int = 5) -> None:
+    rows = make_rows(count)
+    assert isinstance(hydrate(rows[:1], _item_from_row)[0], OrderItem)
+    print(f"{count} order items, best of {repeat} runs")
+    results = {}
+    for name, fn in (("dataclass", legacy_item_from_row), ("slots", _item_from_row)):
+        best = min(timeit.repeat(lambda: hydrate(rows, fn), repeat=repeat, number=1))
+        memory = retained_bytes(rows, fn)
+        results[name] = (best, memory)
+        print(f"  {name:<10} {best * 1000:8.2f} ms  {memory / 2**20:8.2f} MiB")
+    (old_time, old_memory), (new_time, new_memory) = results["dataclass"], results["slots"]
+    print(f"  speedup    {old_time / new_time:8.2f}x  {old_memory / new_memory:8.2f}x less memory")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,93 @@
+"""Benchmark: order list serialization, FastAPI response_model path vs fast path.
+
+Run from backend/:  python -m benchmarks.bench_serialization [orders] [items]
+
+The "response_model" path reproduces what FastAPI does for a route that
+returns validated response models: build them, dump to a dict, validate
+again against the response field, serialize to JSON-compatible data and
+encode it with JSONResponse. The "fast" path is app.api.serialization:
+plain dicts encoded by pydantic-core.
+"""
+
+import asyncio
+import sys
+import timeit
+import uuid
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.schemas import OrderItemResponse, OrderPage, OrderResponse
+from app.api.serialization import json_response, order_page
+from app.domain.order import Order
+
+
+def make_orders(count: int, items: int):
+    orders = []
+    for _ in range(count):
+        order = Order(user_id=uuid.uuid4())
+        for n in range(items):
+            order.add_item(f"Product {n}", Decimal("19.99"), n + 1)
+        orders.append(order)
+    return orders
+
+
+def validated_page(orders) -> OrderPage:
+    """The models the routes used to build before the fast path."""
+    return OrderPage(
+        items=[
+            OrderResponse(
+                id=o.id,
+                user_id=o.user_id,
+                status=o.status.value,
+                total_amount=o.total_amount.to_decimal(),
+                created_at=o.created_at,
+                items=[
+                    OrderItemResponse(
+                        id=i.id,
+                        product_name=i.product_name,
+                        price=i.price.to_decimal(),
+                        quantity=i.quantity,
+                        subtotal=i.subtotal.to_decimal(),
+                    )
+                    for i in o.items
+                ],
+            )
+            for o in orders
+        ],
+        next_cursor=None,
+    )
+
+
+_FIELD = create_response_field(name="Response_list_orders", type_=OrderPage)
+
+
+def response_model_path(orders) -> bytes:
+    content = asyncio.run(serialize_response(
+        field=_FIELD,
+        response_content=validated_page(orders),
+        is_coroutine=True,
+    ))
+    return JSONResponse(content).body
+
+
+def fast_path(orders) -> bytes:
+    return json_response(order_page(orders, None)).body
+
+
+def main(count: int = 500, items: int = 5, repeat: int = 5, number: int = 5) -> None:
+    orders = make_orders(count, items)
+    assert response_model_path(orders) == fast_path(orders)
+    print(f"{count} orders x {items} items, best of {repeat} x {number} runs")
+    results = {}
+    for name, fn in (("response_model", response_model_path), ("fast", fast_path)):
+        best = min(timeit.repeat(lambda: fn(orders), repeat=repeat, number=number)) / number
+        results[name] = best
+        print(f"  {name:<15} {best * 1000:8.2f} ms")
+    print(f"  speedup         {results['response_model'] / results['fast']:8.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,36 @@
+-- ============================================
+-- Версия заказа и быстрая проверка повторной оплаты
+-- ============================================
+
+-- Версия строки для оптимистической блокировки: каждое изменение заказа
+-- увеличивает её, UPDATE с устаревшей версией не затрагивает ни одной строки.
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+-- Момент первой оплаты хранится в самой строке заказа, поэтому триггеру
+-- больше не нужно сканировать order_status_history.
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS paid_at TIMESTAMPTZ;
+
+UPDATE orders o
+SET paid_at = h.changed_at
+FROM (
+    SELECT order_id, MIN(changed_at) AS changed_at
+    FROM order_status_history
+    WHERE status = 'paid'
+    GROUP BY order_id
+) h
+WHERE h.order_id = o.id AND o.paid_at IS NULL;
+
+-- Триггер trigger_check_order_not_already_paid из 001 остаётся прежним
+-- (BEFORE UPDATE OF status ... WHEN NEW.status = 'paid'), меняется только
+-- функция: проверка одного поля вместо поиска по истории.
+CREATE OR REPLACE FUNCTION check_order_not_already_paid()
+RETURNS trigger AS $$
+BEGIN
+    IF OLD.paid_at IS NOT NULL THEN
+        RAISE EXCEPTION 'Order % is already paid', NEW.id;
+    END IF;
+
+    NEW.paid_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
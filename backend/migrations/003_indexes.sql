@@ -0,0 +1,26 @@
+-- migrate: no-transaction
+-- ============================================
+-- Вторичные индексы
+-- ============================================
+-- Индексы строятся CONCURRENTLY, без блокировки записи в таблицы.
+-- Если построение прервалось, невалидный индекс нужно удалить
+-- (DROP INDEX CONCURRENTLY ...) и запустить миграцию снова.
+
+-- Заказы пользователя с keyset-пагинацией (find_by_user, фильтр user_id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_user_id_created_at_id
+    ON orders (user_id, created_at, id);
+
+-- Товары заказа
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_order_items_order_id
+    ON order_items (order_id);
+
+-- История статусов заказа
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_order_status_history_order_id_status
+    ON order_status_history (order_id, status);
+
+-- Keyset-пагинация по (created_at, id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_created_at_id
+    ON orders (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_created_at_id
+    ON users (created_at, id);
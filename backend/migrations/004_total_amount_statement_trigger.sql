@@ -0,0 +1,80 @@
+-- ============================================
+-- Пересчёт total_amount триггером уровня оператора
+-- ============================================
+-- Построчный trigger_update_total_amount из 001 на каждую вставленную
+-- позицию заново суммирует все товары заказа и обновляет строку orders.
+-- Вместо него триггеры FOR EACH STATEMENT читают таблицы переходов и
+-- применяют к каждому затронутому заказу одну инкрементальную дельту.
+-- Удаление товаров теперь тоже уменьшает сумму.
+
+DROP TRIGGER IF EXISTS trigger_update_total_amount ON order_items;
+DROP FUNCTION IF EXISTS update_total_amount();
+
+CREATE OR REPLACE FUNCTION apply_order_items_delta()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE orders o
+        SET total_amount = o.total_amount + d.delta
+        FROM (
+            SELECT order_id, SUM(price * quantity) AS delta
+            FROM new_items
+            GROUP BY order_id
+        ) d
+        WHERE o.id = d.order_id;
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE orders o
+        SET total_amount = o.total_amount + d.delta
+        FROM (
+            SELECT order_id, SUM(amount) AS delta
+            FROM (
+                SELECT order_id, price * quantity AS amount FROM new_items
+                UNION ALL
+                SELECT order_id, -(price * quantity) FROM old_items
+            ) changes
+            GROUP BY order_id
+        ) d
+        WHERE o.id = d.order_id AND d.delta <> 0;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE orders o
+        SET total_amount = o.total_amount - d.delta
+        FROM (
+            SELECT order_id, SUM(price * quantity) AS delta
+            FROM old_items
+            GROUP BY order_id
+        ) d
+        WHERE o.id = d.order_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_order_items_total_insert
+AFTER INSERT ON order_items
+REFERENCING NEW TABLE AS new_items
+FOR EACH STATEMENT
+EXECUTE FUNCTION apply_order_items_delta();
+
+CREATE TRIGGER trigger_order_items_total_update
+AFTER UPDATE ON order_items
+REFERENCING OLD TABLE AS old_items NEW TABLE AS new_items
+FOR EACH STATEMENT
+EXECUTE FUNCTION apply_order_items_delta();
+
+CREATE TRIGGER trigger_order_items_total_delete
+AFTER DELETE ON order_items
+REFERENCING OLD TABLE AS old_items
+FOR EACH STATEMENT
+EXECUTE FUNCTION apply_order_items_delta();
+
+-- Выравниваем суммы, которые могли разойтись с товарами до этой миграции
+-- (удаления товаров прежний триггер не учитывал).
+UPDATE orders o
+SET total_amount = t.total
+FROM (
+    SELECT o2.id, COALESCE(SUM(i.price * i.quantity), 0) AS total
+    FROM orders o2
+    LEFT JOIN order_items i ON i.order_id = o2.id
+    GROUP BY o2.id
+) t
+WHERE o.id = t.id AND o.total_amount <> t.total;
@@ -0,0 +1,39 @@
+-- ============================================
+-- Статус заказа как ENUM вместо VARCHAR с внешним ключом
+-- ============================================
+-- ENUM занимает 4 байта вместо строки и не требует проверки внешнего
+-- ключа к order_statuses при каждой записи. Значения те же, поэтому
+-- приложение по-прежнему читает и пишет строки ('created', 'paid', ...).
+-- Таблица order_statuses остаётся справочником описаний.
+
+DO $$
+BEGIN
+    CREATE TYPE order_status AS ENUM ('created', 'paid', 'cancelled', 'shipped', 'completed');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END;
+$$;
+
+-- Тип столбца нельзя изменить, пока он упоминается в WHEN триггеров.
+DROP TRIGGER IF EXISTS trigger_check_order_not_already_paid ON orders;
+DROP TRIGGER IF EXISTS trigger_log_change_status ON orders;
+
+ALTER TABLE orders DROP CONSTRAINT IF EXISTS orders_status_fkey;
+ALTER TABLE order_status_history DROP CONSTRAINT IF EXISTS order_status_history_status_fkey;
+
+ALTER TABLE orders
+    ALTER COLUMN status TYPE order_status USING status::order_status;
+ALTER TABLE order_status_history
+    ALTER COLUMN status TYPE order_status USING status::order_status;
+
+CREATE TRIGGER trigger_check_order_not_already_paid
+BEFORE UPDATE OF status ON orders
+FOR EACH ROW
+WHEN (NEW.status = 'paid')
+EXECUTE FUNCTION check_order_not_already_paid();
+
+CREATE TRIGGER trigger_log_change_status
+AFTER UPDATE OF status ON orders
+FOR EACH ROW
+WHEN (NEW.status <> OLD.status)
+EXECUTE FUNCTION log_change_status();
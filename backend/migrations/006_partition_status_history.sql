@@ -0,0 +1,67 @@
+-- ============================================
+-- Секционирование order_status_history по месяцам
+-- ============================================
+-- История только дописывается, поэтому секции по changed_at позволяют
+-- запросам с условием по времени читать только свежие месяцы, а старые
+-- секции отключать и переносить в схему archive целиком
+-- (python -m app.infrastructure.partitions archive).
+
+-- Секция за месяц, содержащий `month`: order_status_history_yYYYYmMM.
+CREATE OR REPLACE FUNCTION create_order_status_history_partition(month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_at DATE := date_trunc('month', month)::date;
+    partition_name TEXT := format('order_status_history_y%sm%s',
+                                  to_char(start_at, 'YYYY'), to_char(start_at, 'MM'));
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF order_status_history
+         FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_at, (start_at + INTERVAL '1 month')::date
+    );
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Секции с текущего месяца на `months_ahead` месяцев вперёд.
+CREATE OR REPLACE FUNCTION ensure_order_status_history_partitions(months_ahead INTEGER DEFAULT 3)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM create_order_status_history_partition(
+        (date_trunc('month', NOW()) + make_interval(months => n))::date
+    )
+    FROM generate_series(0, months_ahead) AS n;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE order_status_history RENAME TO order_status_history_unpartitioned;
+
+CREATE TABLE order_status_history (
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
+    order_id UUID NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+    status order_status NOT NULL,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, changed_at)
+) PARTITION BY RANGE (changed_at);
+
+-- Страховка на случай, если секция на месяц не была создана заранее.
+CREATE TABLE order_status_history_default
+    PARTITION OF order_status_history DEFAULT;
+
+SELECT create_order_status_history_partition(month::date)
+FROM (
+    SELECT DISTINCT date_trunc('month', changed_at) AS month
+    FROM order_status_history_unpartitioned
+    WHERE changed_at IS NOT NULL
+) months;
+
+SELECT ensure_order_status_history_partitions();
+
+INSERT INTO order_status_history (id, order_id, status, changed_at)
+SELECT id, order_id, status, COALESCE(changed_at, NOW())
+FROM order_status_history_unpartitioned;
+
+DROP TABLE order_status_history_unpartitioned;
+
+CREATE INDEX IF NOT EXISTS idx_order_status_history_order_id_status
+    ON order_status_history (order_id, status);
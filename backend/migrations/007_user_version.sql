@@ -0,0 +1,6 @@
+-- ============================================
+-- Версия пользователя
+-- ============================================
+-- Как и orders.version, увеличивается при каждом изменении строки;
+-- из неё API строит ETag без загрузки и сериализации пользователя.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
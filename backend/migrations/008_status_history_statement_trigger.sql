@@ -0,0 +1,31 @@
+-- ============================================
+-- Запись истории статусов триггером уровня оператора
+-- ============================================
+-- Построчный trigger_log_change_status из 001 вставлял в историю по одной
+-- строке на каждый изменённый заказ. Массовая смена статуса (один UPDATE
+-- по многим заказам) теперь пишет историю одним многострочным INSERT из
+-- таблиц переходов.
+-- У триггера с таблицами переходов не может быть списка столбцов
+-- (UPDATE OF status), поэтому он срабатывает на любой UPDATE orders и сам
+-- отбирает строки, где статус изменился.
+
+DROP TRIGGER IF EXISTS trigger_log_change_status ON orders;
+DROP FUNCTION IF EXISTS log_change_status();
+
+CREATE OR REPLACE FUNCTION log_orders_status_changes()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO order_status_history (order_id, status, changed_at)
+    SELECT n.id, n.status, NOW()
+    FROM new_orders n
+    JOIN old_orders o ON o.id = n.id
+    WHERE n.status <> o.status;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_log_change_status
+AFTER UPDATE ON orders
+REFERENCING OLD TABLE AS old_orders NEW TABLE AS new_orders
+FOR EACH STATEMENT
+EXECUTE FUNCTION log_orders_status_changes();
@@ -0,0 +1,61 @@
+-- ============================================
+-- Секции истории статусов при строках в DEFAULT
+-- ============================================
+-- Если секцию на месяц не создали вовремя, строки этого месяца попадают в
+-- order_status_history_default, и CREATE TABLE ... PARTITION OF ... FOR
+-- VALUES для него падает: DEFAULT уже содержит строки из диапазона.
+-- Теперь секция создаётся отдельной таблицей, строки её месяца переносятся
+-- в неё из DEFAULT, и только затем она подключается к order_status_history.
+
+CREATE OR REPLACE FUNCTION create_order_status_history_partition(month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_at DATE := date_trunc('month', month)::date;
+    end_at DATE := (start_at + INTERVAL '1 month')::date;
+    partition_name TEXT := format('order_status_history_y%sm%s',
+                                  to_char(start_at, 'YYYY'), to_char(start_at, 'MM'));
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    -- Не даёт новым строкам месяца попасть в DEFAULT между переносом и
+    -- подключением секции; чтение DEFAULT не блокируется.
+    LOCK TABLE order_status_history_default IN EXCLUSIVE MODE;
+
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE order_status_history INCLUDING DEFAULTS)',
+        partition_name
+    );
+    EXECUTE format(
+        'WITH moved AS (
+             DELETE FROM order_status_history_default
+             WHERE changed_at >= %L AND changed_at < %L
+             RETURNING id, order_id, status, changed_at
+         )
+         INSERT INTO %I (id, order_id, status, changed_at)
+         SELECT id, order_id, status, changed_at FROM moved',
+        start_at, end_at, partition_name
+    );
+    -- Индексы и внешний ключ родительской таблицы создаются при подключении.
+    EXECUTE format(
+        'ALTER TABLE order_status_history ATTACH PARTITION %I
+         FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_at, end_at
+    );
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Несколько экземпляров приложения вызывают функцию по расписанию;
+-- блокировка не даёт им одновременно создавать одну и ту же секцию.
+CREATE OR REPLACE FUNCTION ensure_order_status_history_partitions(months_ahead INTEGER DEFAULT 3)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('order_status_history_partitions'));
+    PERFORM create_order_status_history_partition(
+        (date_trunc('month', NOW()) + make_interval(months => n))::date
+    )
+    FROM generate_series(0, months_ahead) AS n;
+END;
+$$ LANGUAGE plpgsql;
@@ -1,11 +1,20 @@
 import { useState, useEffect } from 'react'
 
 const API_URL = '/api'
+const PAGE_SIZE = 50
+
+// Replace the entry with the same id, or append a new one.
+const upsert = (list, item) =>
+  list.some((x) => x.id === item.id)
+    ? list.map((x) => (x.id === item.id ? item : x))
+    : [...list, item]
 
 function App() {
   const [activeTab, setActiveTab] = useState('users')
   const [users, setUsers] = useState([])
   const [orders, setOrders] = useState([])
+  const [usersCursor, setUsersCursor] = useState(null)
+  const [ordersCursor, setOrdersCursor] = useState(null)
   const [error, setError] = useState(null)
   const [success, setSuccess] = useState(null)
   const [loading, setLoading] = useState(false)
@@ -41,28 +50,48 @@ function App() {
   }
 
   // API calls
-  const fetchUsers = async () => {
+  // Listings are keyset-paginated: the first page is loaded up front and
+  // further pages only on "Load more", following next_cursor.
+  const fetchPage = async (path, cursor) => {
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) })
+    if (cursor) params.set('cursor', cursor)
+    const res = await fetch(`${API_URL}/${path}?${params}`)
+    return res.ok ? res.json() : null
+  }
+
+  const fetchUsers = async (cursor = null) => {
     try {
-      const res = await fetch(`${API_URL}/users`)
-      if (res.ok) {
-        setUsers(await res.json())
+      const page = await fetchPage('users', cursor)
+      if (page) {
+        setUsers((prev) => (cursor ? [...prev, ...page.items] : page.items))
+        setUsersCursor(page.next_cursor)
       }
     } catch (e) {
       console.error('Failed to fetch users:', e)
     }
   }
 
-  const fetchOrders = async () => {
+  const fetchOrders = async (cursor = null) => {
     try {
-      const res = await fetch(`${API_URL}/orders`)
-      if (res.ok) {
-        setOrders(await res.json())
+      const page = await fetchPage('orders', cursor)
+      if (page) {
+        setOrders((prev) => (cursor ? [...prev, ...page.items] : page.items))
+        setOrdersCursor(page.next_cursor)
       }
     } catch (e) {
       console.error('Failed to fetch orders:', e)
     }
   }
 
+  // Reload one order after a change instead of refetching the listing.
+  const refreshOrder = async (orderId) => {
+    const res = await fetch(`${API_URL}/orders/${orderId}`)
+    if (res.ok) {
+      const order = await res.json()
+      setOrders((prev) => upsert(prev, order))
+    }
+  }
+
   const createUser = async (e) => {
     e.preventDefault()
     setLoading(true)
@@ -73,10 +102,11 @@ function App() {
         body: JSON.stringify({ email: userEmail, name: userName }),
       })
       if (res.ok) {
+        const user = await res.json()
         showSuccess('User created successfully!')
         setUserEmail('')
         setUserName('')
-        fetchUsers()
+        setUsers((prev) => upsert(prev, user))
       } else {
         const data = await res.json()
         showError(data.detail || 'Failed to create user')
@@ -101,8 +131,9 @@ function App() {
         body: JSON.stringify({ user_id: selectedUserId }),
       })
       if (res.ok) {
+        const order = await res.json()
         showSuccess('Order created successfully!')
-        fetchOrders()
+        setOrders((prev) => upsert(prev, order))
       } else {
         const data = await res.json()
         showError(data.detail || 'Failed to create order')
@@ -135,7 +166,7 @@ function App() {
         setProductName('')
         setProductPrice('')
         setProductQuantity('1')
-        fetchOrders()
+        refreshOrder(selectedOrderId)
       } else {
         const data = await res.json()
         showError(data.detail || 'Failed to add item')
@@ -153,8 +184,9 @@ function App() {
         method: 'POST',
       })
       if (res.ok) {
+        const order = await res.json()
         showSuccess('Order paid successfully!')
-        fetchOrders()
+        setOrders((prev) => upsert(prev, order))
       } else {
         const data = await res.json()
         showError(data.detail || 'Failed to pay order')
@@ -172,8 +204,9 @@ function App() {
         method: 'POST',
       })
       if (res.ok) {
+        const order = await res.json()
         showSuccess('Order cancelled!')
-        fetchOrders()
+        setOrders((prev) => upsert(prev, order))
       } else {
         const data = await res.json()
         showError(data.detail || 'Failed to cancel order')
@@ -237,7 +270,7 @@ function App() {
           </div>
 
           <div className="card">
-            <h2>Users ({users.length})</h2>
+            <h2>Users ({users.length}{usersCursor ? '+' : ''})</h2>
             <table>
               <thead>
                 <tr>
@@ -254,6 +287,11 @@ function App() {
                 ))}
               </tbody>
             </table>
+            {usersCursor && (
+              <button className="btn btn-primary" onClick={() => fetchUsers(usersCursor)}>
+                Load more
+              </button>
+            )}
           </div>
         </div>
       )}
@@ -343,7 +381,7 @@ function App() {
           </div>
 
           <div className="card">
-            <h2>Orders ({orders.length})</h2>
+            <h2>Orders ({orders.length}{ordersCursor ? '+' : ''})</h2>
             {orders.map((order) => (
               <div key={order.id} className="card" style={{ background: '#fafafa' }}>
                 <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
@@ -394,6 +432,11 @@ function App() {
                 </div>
               </div>
             ))}
+            {ordersCursor && (
+              <button className="btn btn-primary" onClick={() => fetchOrders(ordersCursor)}>
+                Load more
+              </button>
+            )}
           </div>
         </>
       )}